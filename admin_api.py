@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import json
 import time
 import sqlite3
-import subprocess
-import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
-from flask import Flask, jsonify, redirect, render_template, request
+from flask import Flask, Response, jsonify, redirect, render_template, request, stream_with_context
+
+from migrate_db import migrate
 
 DB_PATH = Path("ir_stats.db")
 
@@ -50,6 +53,9 @@ LIVE_STATE = {
     # transient overlay event for scoreboard popups
     "eventSeq": 0,
     "event": None,
+
+    # bumped whenever anything above changes
+    "seq": 0,
 }
 
 LINEUP_STATE = {
@@ -65,54 +71,180 @@ ENDGAME_STATE = {
 }
 
 
+class ConnectionPool:
+    """
+    hands every thread its own sqlite connection and keeps released ones for
+    the next request, so handlers skip connect / pragma cost and keep their
+    prepared statement cache. migrations run once, on first connect.
+    """
+
+    def __init__(self, path: Path, size: int = 8):
+        self.path = path
+        self.size = size
+        self.idle: list[sqlite3.Connection] = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def connect(self) -> sqlite3.Connection:
+        # connections move between request threads, but only one thread uses each at a time
+        c = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+        c.execute("pragma journal_mode=WAL")
+        c.execute("pragma synchronous=NORMAL")
+        return c
+
+    def get(self) -> sqlite3.Connection:
+        c = getattr(self.local, "con", None)
+        if c is not None:
+            return c
+        with self.lock:
+            c = self.idle.pop() if self.idle else None
+        if c is None:
+            c = self.connect()
+        self.local.con = c
+        return c
+
+    def release(self) -> None:
+        """gives the calling thread's connection back to the pool"""
+        c = getattr(self.local, "con", None)
+        if c is None:
+            return
+        self.local.con = None
+        if c.in_transaction:
+            c.rollback()
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append(c)
+                return
+        c.close()
+
+
+def ensure_schema() -> None:
+    """runs pending migrations (see migrate_db.py) once, before the app takes requests"""
+    c = sqlite3.connect(DB_PATH)
+    try:
+        migrate(c)
+    finally:
+        c.close()
+
+
+POOL = ConnectionPool(DB_PATH)
+
+
 def con():
-    return sqlite3.connect(DB_PATH)
+    return POOL.get()
 
 
-def ensure_meta_tables():
-    c = con()
-    cur = c.cursor()
-    cur.execute(
-        """
-        create table if not exists OpponentMeta (
-            opp text primary key,
-            color text
-        )
-        """
-    )
-    c.commit()
-    c.close()
+@app.teardown_request
+def release_connection(_exc):
+    POOL.release()
 
 
-def ensure_event_tables():
-    c = con()
-    cur = c.cursor()
-    cur.execute(
+class ReadCache:
+    """
+    bounded lru cache for the read endpoints. each entry is tagged with what it
+    was read from (e.g. "player:<name>", "opponents"), and the write paths
+    drop exactly the tags they touch.
+    """
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self.entries: OrderedDict = OrderedDict()
+        self.tagged: dict[str, set] = {}
+        self.lock = threading.Lock()
+        # bumped by every invalidation, so a load that raced a write isn't stored
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, tags: list[str], load):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+            generation = self.generation
+
+        value = load()
+
+        with self.lock:
+            if generation == self.generation:
+                self.store(key, value, tags)
+        return value
+
+    def get_many(self, tagged: dict, load) -> dict:
         """
-        create table if not exists game_events (
-            id integer primary key autoincrement,
-            season integer not null,
-            game integer not null,
-            type text,
-            opp text,
-            period text,
-            clock text,
-            event_kind text not null,
-            player text,
-            other_player text,
-            code text,
-            points integer default 0
-        )
+        get() for several keys at once. tagged maps each key to its tags; load
+        is called once with the missing keys and returns their values by key.
         """
-    )
-    c.commit()
-    c.close()
+        found = {}
+        with self.lock:
+            for key in tagged:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    found[key] = self.entries[key][0]
+            missing = [key for key in tagged if key not in found]
+            self.misses += len(missing)
+            generation = self.generation
+
+        if missing:
+            loaded = load(missing)
+            with self.lock:
+                if generation == self.generation:
+                    for key in missing:
+                        self.store(key, loaded[key], tagged[key])
+            found.update(loaded)
+        return {key: found[key] for key in tagged}
+
+    def store(self, key, value, tags: list[str]) -> None:
+        # caller holds the lock
+        self.entries[key] = (value, tags)
+        for tag in tags:
+            self.tagged.setdefault(tag, set()).add(key)
+        while len(self.entries) > self.size:
+            self.drop(next(iter(self.entries)))
+            self.evictions += 1
+
+    def drop(self, key) -> None:
+        _, tags = self.entries.pop(key)
+        for tag in tags:
+            keys = self.tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tagged[tag]
+
+    def invalidate(self, *tags: str) -> None:
+        with self.lock:
+            self.generation += 1
+            for tag in tags:
+                for key in list(self.tagged.get(tag, ())):
+                    self.drop(key)
+                    self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "size": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+READ_CACHE = ReadCache()
 
 
 def set_opp_color(opp: str, color: str) -> None:
     if not opp:
         return
-    ensure_meta_tables()
     c = con()
     cur = c.cursor()
     cur.execute(
@@ -124,19 +256,20 @@ def set_opp_color(opp: str, color: str) -> None:
         (opp, color),
     )
     c.commit()
-    c.close()
+    READ_CACHE.invalidate(f"opp:{opp}", "opponents")
 
 
 def get_opp_color(opp: str) -> str | None:
     if not opp:
         return None
-    ensure_meta_tables()
-    c = con()
-    cur = c.cursor()
-    cur.execute("select color from OpponentMeta where opp=?", (opp,))
-    row = cur.fetchone()
-    c.close()
-    return row[0] if row and row[0] else None
+
+    def load():
+        cur = con().cursor()
+        cur.execute("select color from OpponentMeta where opp=?", (opp,))
+        row = cur.fetchone()
+        return row[0] if row and row[0] else None
+
+    return READ_CACHE.get(("opp_color", opp), [f"opp:{opp}"], load)
 
 
 def career_ft_pct(name: str) -> int | None:
@@ -150,14 +283,11 @@ def career_ft_pct(name: str) -> int | None:
 
     c = con()
     cur = c.cursor()
-    try:
-        cur.execute(
-            'select coalesce(sum("FTM"),0), coalesce(sum("FTA"),0) from InjuryReserves where NAMES=?',
-            (name,),
-        )
-        ftm, fta = cur.fetchone() or (0, 0)
-    finally:
-        c.close()
+    cur.execute(
+        'select "FTM", "FTA" from player_career_summary where name=?',
+        (name,),
+    )
+    ftm, fta = cur.fetchone() or (0, 0)
 
     ftm = int(ftm or 0)
     fta = int(fta or 0)
@@ -167,13 +297,278 @@ def career_ft_pct(name: str) -> int | None:
 
 # ---- build step ----
 
-def rebuild_json():
-    # keep your existing pipeline
-    subprocess.check_call([sys.executable, "build_data_from_sqlite.py"])
+# background publish queue. every save takes a ticket; the worker builds up to
+# the newest ticket, so saves that land while a build runs share the next one.
+BUILD_STATE = {
+    "requested": 0,  # newest ticket handed out
+    "covered": 0,  # newest ticket included in the running or last build
+    "built": 0,  # newest ticket included in the last finished build
+    "running": False,
+    "builds": 0,
+    "lastStarted": None,
+    "lastFinished": None,
+    "lastDuration": None,
+    "lastOk": None,
+    "lastError": None,
+    "lastErrorAt": None,
+}
+BUILD_COND = threading.Condition()
+_build_worker = None
+
+# (season, game) pairs saved since the last build started; None means reload everything
+DIRTY_GAMES: set | None = set()
+
+# the build runs in this process and keeps the tables loaded between saves
+_resident_build = None
+
+
+def rebuild_json(games: set | None = None):
+    # only re-read and rebuild what the saved games touch
+    global _resident_build
+    if _resident_build is None:
+        # imported here so pandas only loads once the first build runs
+        from build_data_from_sqlite import ResidentBuild
+
+        _resident_build = ResidentBuild(DB_PATH)
+        games = None
+    try:
+        return _resident_build.build(games)
+    except BaseException:
+        # start over from a full load next time
+        _resident_build = None
+        raise
+
+
+def build_worker():
+    global DIRTY_GAMES
+    while True:
+        with BUILD_COND:
+            while BUILD_STATE["covered"] >= BUILD_STATE["requested"]:
+                BUILD_COND.wait()
+            ticket = BUILD_STATE["requested"]
+            games, DIRTY_GAMES = DIRTY_GAMES, set()
+            BUILD_STATE["covered"] = ticket
+            BUILD_STATE["running"] = True
+            BUILD_STATE["lastStarted"] = time.time()
+
+        start = time.perf_counter()
+        error = None
+        try:
+            rebuild_json(games)
+        except BaseException as e:
+            error = str(e) or type(e).__name__
+
+        with BUILD_COND:
+            BUILD_STATE["running"] = False
+            BUILD_STATE["built"] = ticket
+            BUILD_STATE["builds"] += 1
+            BUILD_STATE["lastFinished"] = time.time()
+            BUILD_STATE["lastDuration"] = round(time.perf_counter() - start, 3)
+            BUILD_STATE["lastOk"] = error is None
+            if error is not None:
+                BUILD_STATE["lastError"] = error
+                BUILD_STATE["lastErrorAt"] = BUILD_STATE["lastFinished"]
+            BUILD_COND.notify_all()
+
+
+def request_rebuild(games: set | None = None) -> int:
+    """
+    queues a rebuild for the given (season, game) pairs (None = everything)
+    and returns its ticket; never waits for the build.
+    """
+    global _build_worker, DIRTY_GAMES
+    with BUILD_COND:
+        if games is None or DIRTY_GAMES is None:
+            DIRTY_GAMES = None
+        else:
+            DIRTY_GAMES |= games
+        if _build_worker is None or not _build_worker.is_alive():
+            _build_worker = threading.Thread(target=build_worker, name="build-worker", daemon=True)
+            _build_worker.start()
+        BUILD_STATE["requested"] += 1
+        BUILD_COND.notify_all()
+        return BUILD_STATE["requested"]
+
+
+def build_status() -> dict:
+    with BUILD_COND:
+        status = dict(BUILD_STATE)
+    status["queueDepth"] = status["requested"] - status["covered"]
+    return status
+
+
+@app.get("/api/build_status")
+def get_build_status():
+    return jsonify(build_status())
+
+
+# ---- live push (server-sent events) ----
+
+def scoreboard_payload() -> dict:
+    return dict(LIVE_STATE)
+
+
+def overlay_state_payload(fields: list[str] | None = None) -> dict:
+    """score, colors, stripes and the current event in one dict, cut down to fields if given"""
+    if not fields:
+        return dict(LIVE_STATE)
+    # seq always comes back so callers can long-poll on it
+    return {k: LIVE_STATE[k] for k in ["seq", *fields] if k in LIVE_STATE}
+
+
+def overlay_event_payload() -> dict:
+    return {"ok": True, "seq": int(LIVE_STATE.get("eventSeq", 0) or 0), "event": LIVE_STATE.get("event")}
+
+
+def lineup_payload() -> dict:
+    return {
+        "ok": True,
+        "seq": LINEUP_STATE["seq"],
+        "state": LINEUP_STATE["state"]
+    }
+
+
+def endgame_payload() -> dict:
+    return {
+        "ok": True,
+        "seq": int(ENDGAME_STATE.get("seq", 0) or 0),
+        "state": ENDGAME_STATE.get("state"),
+    }
+
+
+STREAM_CHANNELS = {
+    "scoreboard": scoreboard_payload,
+    "event": overlay_event_payload,
+    "lineup": lineup_payload,
+    "endgame": endgame_payload,
+    # defined further down with the rest of the live box code
+    "livebox": lambda: live_box_payload(),
+}
+STREAM_PING_SECONDS = 15
+
+
+class Subscriber:
+    """
+    one open /api/stream connection. only the newest payload per channel is
+    kept, so a slow overlay skips stale states instead of queueing them.
+    """
+
+    def __init__(self, channels: set[str]):
+        self.channels = channels
+        self.pending: dict[str, str] = {}
+        self.cond = threading.Condition()
+
+    def push(self, channel: str, data: str) -> None:
+        with self.cond:
+            self.pending[channel] = data
+            self.cond.notify()
+
+    def wait(self, timeout: float) -> dict[str, str]:
+        with self.cond:
+            if not self.pending:
+                self.cond.wait(timeout)
+            items, self.pending = self.pending, {}
+            return items
+
+
+SUBSCRIBERS: set[Subscriber] = set()
+SUBSCRIBERS_LOCK = threading.Lock()
+
+# long-polling GETs wait on this until the sequence number they hold changes
+STATE_CHANGED = threading.Condition()
+STATE_SEQS = {
+    "scoreboard": lambda: int(LIVE_STATE.get("seq", 0) or 0),
+    "event": lambda: int(LIVE_STATE.get("eventSeq", 0) or 0),
+    "lineup": lambda: int(LINEUP_STATE.get("seq", 0) or 0),
+    "endgame": lambda: int(ENDGAME_STATE.get("seq", 0) or 0),
+    "livebox": lambda: live_box_seq(),
+}
+LONG_POLL_MAX_MS = 30000
+
+# sequence numbers restart with the process, so etags carry a per-boot prefix
+BOOT_ID = format(time.time_ns(), "x")
+
+
+def publish(channel: str) -> None:
+    """wakes long-polls on channel and sends its state to every overlay streaming it"""
+    with STATE_CHANGED:
+        STATE_CHANGED.notify_all()
+
+    with SUBSCRIBERS_LOCK:
+        subs = [sub for sub in SUBSCRIBERS if channel in sub.channels]
+    if not subs:
+        return
+    data = json.dumps(STREAM_CHANNELS[channel]())
+    for sub in subs:
+        sub.push(channel, data)
+
+
+def sse(channel: str, data: str) -> str:
+    return f"event: {channel}\ndata: {data}\n\n"
+
+
+@app.get("/api/stream")
+def stream():
+    """
+    server-sent events for the overlays. ?channels= picks from scoreboard,
+    event, lineup and endgame (default: all); each sends the same json as its
+    GET endpoint, once on connect and again on every change.
+    """
+    names = [c.strip() for c in (request.args.get("channels") or "").split(",") if c.strip()]
+    channels = {c for c in names if c in STREAM_CHANNELS} or set(STREAM_CHANNELS)
+    sub = Subscriber(channels)
+    with SUBSCRIBERS_LOCK:
+        SUBSCRIBERS.add(sub)
+
+    def events():
+        try:
+            yield "retry: 1000\n\n"
+            for channel in sorted(channels):
+                yield sse(channel, json.dumps(STREAM_CHANNELS[channel]()))
+            while True:
+                items = sub.wait(STREAM_PING_SECONDS)
+                if not items:
+                    yield ": ping\n\n"
+                for channel, data in items.items():
+                    yield sse(channel, data)
+        finally:
+            with SUBSCRIBERS_LOCK:
+                SUBSCRIBERS.discard(sub)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
+def state_response(channel: str, payload=None):
+    """
+    GET response for an overlay state. the etag is the state's sequence number,
+    so an unchanged If-None-Match gets a 304. ?since=<seq>&wait=<ms> holds the
+    request until the sequence number differs from since or the wait runs out.
+    """
+    seq = STATE_SEQS[channel]
+    since = request.args.get("since", type=int)
+    wait_ms = min(max(request.args.get("wait", 0, type=int) or 0, 0), LONG_POLL_MAX_MS)
+    if since is not None and wait_ms:
+        with STATE_CHANGED:
+            STATE_CHANGED.wait_for(lambda: seq() != since, wait_ms / 1000)
+
+    etag = f"{BOOT_ID}-{seq()}"
+    if etag in request.if_none_match:
+        resp = Response(status=304)
+    else:
+        resp = jsonify((payload or STREAM_CHANNELS[channel])())
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
 
 @app.post("/api/live_score")
 def live_score():
     body = request.get_json(force=True) or {}
+    before = dict(LIVE_STATE)
 
     LIVE_STATE["home"] = int(body.get("home", LIVE_STATE["home"]) or 0)
     LIVE_STATE["away"] = int(body.get("away", LIVE_STATE["away"]) or 0)
@@ -207,6 +602,10 @@ def live_score():
     except Exception:
         pass
 
+    # the admin page posts on every render, so only real changes count
+    if LIVE_STATE != before:
+        LIVE_STATE["seq"] = int(LIVE_STATE.get("seq", 0) or 0) + 1
+        publish("scoreboard")
     return {"ok": True}
 
 
@@ -215,16 +614,13 @@ def set_lineup_state():
     body = request.get_json(force=True) or {}
     LINEUP_STATE["seq"] += 1
     LINEUP_STATE["state"] = body.get("state")
+    publish("lineup")
     return jsonify({"ok": True, "seq": LINEUP_STATE["seq"]})
 
 
 @app.get("/api/lineup_state")
 def get_lineup_state():
-    return jsonify({
-        "ok": True,
-        "seq": LINEUP_STATE["seq"],
-        "state": LINEUP_STATE["state"]
-    })
+    return state_response("lineup")
 
 
 @app.get("/lineup")
@@ -234,13 +630,20 @@ def lineup_page():
 
 @app.get("/api/scoreboard")
 def scoreboard_live():
-    return jsonify(LIVE_STATE)
+    return state_response("scoreboard")
+
+
+@app.get("/api/overlay/state")
+def overlay_state():
+    # ?fields=home,away,event keeps the response to what the overlay renders
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()]
+    return state_response("scoreboard", lambda: overlay_state_payload(fields))
 
 
 @app.get("/api/player_career_ft")
 def player_career_ft():
     name = str(request.args.get("name", "") or "").strip()
-    pct = career_ft_pct(name)
+    pct = READ_CACHE.get(("career_ft", name), [f"player:{name}"], lambda: career_ft_pct(name))
     return jsonify({"ok": True, "name": name, "pct": pct})
 
 
@@ -270,6 +673,8 @@ def overlay_event():
         "ttlMs": ttl_ms,
         "ts": int(time.time() * 1000),
     }
+    LIVE_STATE["seq"] = int(LIVE_STATE.get("seq", 0) or 0) + 1
+    publish("event")
     return jsonify({"ok": True, "seq": LIVE_STATE["eventSeq"]})
 
 
@@ -278,29 +683,62 @@ def player_profile():
     name = request.args.get("name", "").strip()
     if not name:
         return {"ok": False}
+    return READ_CACHE.get(("player_profile", name), [f"player:{name}", "player_bio"], lambda: load_player_profile(name))
 
-    c = con()
-    cur = c.cursor()
 
-    # career totals excluding team row
-    cur.execute("""
+def load_player_profile(name: str) -> dict:
+    return load_player_profiles([name])[name]
+
+
+@app.route("/api/player_profiles", methods=["GET", "POST"])
+def player_profiles():
+    """
+    profiles for several players in one round trip, keyed by name.
+    GET ?names=a,b,c or POST {"names": [...]}
+    """
+    if request.method == "POST":
+        names = (request.get_json(force=True) or {}).get("names") or []
+    else:
+        names = request.args.get("names", "").split(",")
+    names = list(dict.fromkeys(str(n).strip() for n in names if str(n).strip()))
+    if not names:
+        return {"ok": False, "error": "names required"}, 400
+
+    # cached per name, shared with /api/player_profile, so every lineup reuses
+    # the same entries and only the players not cached yet hit the database
+    def load(keys: list) -> dict:
+        loaded = load_player_profiles([name for _, name in keys])
+        return {("player_profile", name): profile for name, profile in loaded.items()}
+
+    profiles = READ_CACHE.get_many(
+        {("player_profile", n): [f"player:{n}", "player_bio"] for n in names},
+        load,
+    )
+    return {"ok": True, "profiles": {name: profile for (_, name), profile in profiles.items()}}
+
+
+def load_player_profiles(names: list[str]) -> dict[str, dict]:
+    # career totals come from the trigger-maintained summary (player rows only),
+    # so every name is a primary-key lookup however long the archive gets
+    wanted = ",".join("(?)" for _ in names)
+    rows = con().execute(f"""
+        WITH wanted(name) AS (VALUES {wanted})
         SELECT
-            COUNT(*) as gp,
-            SUM(PTS),
-            SUM(REB),
-            SUM(AST),
-            SUM(STL),
-            SUM(BLK),
-            SUM(TOV),
-            SUM(FGM),
-            SUM(FGA)
-        FROM InjuryReserves
-        WHERE NAMES=?
-          AND NAMES != 'Injury Reserves'
-    """, (name,))
+            w.name,
+            s.gp, s.PTS, s.REB, s.AST, s.STL, s.BLK, s.TOV, s.FGM, s.FGA,
+            b.height,
+            b.position
+        FROM wanted w
+        LEFT JOIN player_career_summary s ON s.name = w.name
+        LEFT JOIN player_bio b ON b.name = w.name
+    """, names).fetchall()
+
+    return {row[0]: profile_from_row(row) for row in rows}
+
 
-    r = cur.fetchone()
-    gp = r[0] or 0
+def profile_from_row(row: tuple) -> dict:
+    name = row[0]
+    gp = row[1] or 0
 
     stats = {
         "gp": gp,
@@ -314,14 +752,14 @@ def player_profile():
     }
 
     if gp > 0:
-        pts = r[1] or 0
-        reb = r[2] or 0
-        ast = r[3] or 0
-        stl = r[4] or 0
-        blk = r[5] or 0
-        tov = r[6] or 0
-        fgm = r[7] or 0
-        fga = r[8] or 0
+        pts = row[2] or 0
+        reb = row[3] or 0
+        ast = row[4] or 0
+        stl = row[5] or 0
+        blk = row[6] or 0
+        tov = row[7] or 0
+        fgm = row[8] or 0
+        fga = row[9] or 0
 
         stats = {
             "gp": gp,
@@ -334,28 +772,18 @@ def player_profile():
             "fg_pct": round((fgm / fga) * 100, 1) if fga else 0
         }
 
-    # height + position
-    cur.execute("""
-        SELECT height, position
-        FROM player_bio
-        WHERE name=?
-    """, (name,))
-    bio = cur.fetchone()
-
-    c.close()
-
     return {
         "ok": True,
         "name": name,
-        "height": bio[0] if bio else None,
-        "position": bio[1] if bio else None,
+        "height": row[10],
+        "position": row[11],
         "stats": stats
     }
 
 
 @app.get("/api/overlay_event")
 def overlay_event_get():
-    return jsonify({"ok": True, "seq": int(LIVE_STATE.get("eventSeq", 0) or 0), "event": LIVE_STATE.get("event")})
+    return state_response("event")
 
 
 @app.get("/api/opponent_meta")
@@ -401,16 +829,13 @@ def set_endgame_state():
     state = body.get("state")
     ENDGAME_STATE["seq"] = int(ENDGAME_STATE.get("seq", 0) or 0) + 1
     ENDGAME_STATE["state"] = state
+    publish("endgame")
     return jsonify({"ok": True, "seq": ENDGAME_STATE["seq"]})
 
 
 @app.get("/api/endgame_state")
 def get_endgame_state():
-    return jsonify({
-        "ok": True,
-        "seq": int(ENDGAME_STATE.get("seq", 0) or 0),
-        "state": ENDGAME_STATE.get("state"),
-    })
+    return state_response("endgame")
 
 
 # ---- optional: db-based scoreboard (not used by obs overlay) ----
@@ -422,20 +847,20 @@ def scoreboard_db():
 
     cur.execute(
         """
-        select NAMES, PTS
+        select ROLE, PTS
         from InjuryReserves
         where SEASON = (select max(SEASON) from InjuryReserves)
           and GAME = (select max(GAME) from InjuryReserves)
+          and ROLE in ('team', 'opponent')
         """
     )
 
     rows = cur.fetchall()
-    c.close()
 
     score = {"home": 0, "away": 0}
 
-    for name, pts in rows:
-        if name == "Injury Reserves":
+    for role, pts in rows:
+        if role == "team":
             score["home"] = pts
         else:
             score["away"] = pts
@@ -448,8 +873,17 @@ def health():
     return {"ok": True, "db_exists": DB_PATH.exists()}
 
 
+@app.get("/api/cache_stats")
+def cache_stats():
+    return jsonify(READ_CACHE.stats())
+
+
 @app.get("/api/admin_v2/bootstrap")
 def admin_v2_bootstrap():
+    return jsonify(READ_CACHE.get(("bootstrap",), ["roster", "games", "opponents", "player_bio"], load_bootstrap))
+
+
+def load_bootstrap() -> dict:
     c = con()
     cur = c.cursor()
 
@@ -475,10 +909,9 @@ def admin_v2_bootstrap():
         """
         SELECT DISTINCT NAMES
         FROM InjuryReserves
-        WHERE NAMES IS NOT NULL
+        WHERE ROLE = 'player'
+          AND NAMES IS NOT NULL
           AND TRIM(NAMES) <> ''
-          AND NAMES <> 'Injury Reserves'
-          AND OPP <> 'Injury Reserves'
         ORDER BY NAMES COLLATE NOCASE
         """
     )
@@ -501,14 +934,12 @@ def admin_v2_bootstrap():
         """
         SELECT season, game, opp, type
         FROM InjuryReserves
-        WHERE NAMES = 'Injury Reserves'
-          AND OPP <> 'Injury Reserves'
+        WHERE ROLE = 'team'
         ORDER BY season DESC, game DESC
         LIMIT 1
         """
     )
     latest = cur.fetchone()
-    c.close()
 
     unique_players = []
     seen = set()
@@ -519,7 +950,7 @@ def admin_v2_bootstrap():
         seen.add(key)
         unique_players.append(name)
 
-    return jsonify({
+    return {
         "ok": True,
         "players": unique_players,
         "bios": bios,
@@ -530,7 +961,339 @@ def admin_v2_bootstrap():
             "opp": latest[2],
             "type": latest[3],
         } if latest else None,
-    })
+    }
+
+# ---- live event ingestion ----
+
+EVENT_INSERT = """
+    insert or ignore into game_events (
+        season, game, type, opp, period, clock,
+        event_kind, player, other_player, code, points, client_id
+    )
+    values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+EVENT_FLUSH_SECONDS = 0.5
+EVENT_FLUSH_ROWS = 200
+
+# rows waiting for the writer thread; the unique (season, game, client_id)
+# index makes a retried post a no-op, so the queue never needs deduping
+EVENT_QUEUE: list[tuple] = []
+EVENT_COND = threading.Condition()
+EVENT_FLUSH_LOCK = threading.Lock()
+_event_writer: threading.Thread | None = None
+
+
+def event_row(season: int, game: int, gtype: str, opp: str, ev: dict) -> tuple | None:
+    kind = str(ev.get("kind", "") or "").strip()
+    if not kind:
+        return None
+    return (
+        season,
+        game,
+        gtype,
+        opp,
+        str(ev.get("period", "") or "").strip(),
+        str(ev.get("clock", "") or "").strip(),
+        kind,
+        str(ev.get("player", "") or "").strip() or None,
+        str(ev.get("toPlayer", ev.get("otherPlayer", "")) or "").strip() or None,
+        str(ev.get("code", ev.get("action", "")) or "").strip() or None,
+        int(ev.get("points", 0) or 0),
+        str(ev.get("id", "") or "").strip() or None,
+    )
+
+
+def flush_events() -> int:
+    """writes every queued event in one transaction, returns how many were queued"""
+    with EVENT_FLUSH_LOCK:
+        with EVENT_COND:
+            rows = EVENT_QUEUE[:]
+            EVENT_QUEUE.clear()
+        if not rows:
+            return 0
+        c = con()
+        try:
+            with c:
+                c.executemany(EVENT_INSERT, rows)
+        except sqlite3.Error:
+            # put the batch back in front; insert or ignore makes the retry safe
+            with EVENT_COND:
+                EVENT_QUEUE[:0] = rows
+            raise
+        return len(rows)
+
+
+def event_writer():
+    while True:
+        with EVENT_COND:
+            while not EVENT_QUEUE:
+                EVENT_COND.wait()
+            # give a burst of plays a moment to pile up into one transaction
+            if len(EVENT_QUEUE) < EVENT_FLUSH_ROWS:
+                EVENT_COND.wait(EVENT_FLUSH_SECONDS)
+        try:
+            flush_events()
+        except sqlite3.Error:
+            app.logger.exception("event flush failed, %d queued rows kept for a retry", len(EVENT_QUEUE))
+            time.sleep(EVENT_FLUSH_SECONDS)
+
+
+def queue_events(rows: list[tuple]) -> None:
+    global _event_writer
+    with EVENT_COND:
+        EVENT_QUEUE.extend(rows)
+        if _event_writer is None or not _event_writer.is_alive():
+            _event_writer = threading.Thread(target=event_writer, name="event-writer", daemon=True)
+            _event_writer.start()
+        if len(EVENT_QUEUE) >= EVENT_FLUSH_ROWS:
+            EVENT_COND.notify_all()
+        else:
+            EVENT_COND.notify()
+
+
+@app.post("/api/events")
+def post_events():
+    """
+    append-only feed of tracker events while a game is in progress. each event
+    carries a client id; posting the same id twice is harmless. ids listed in
+    "retract" (undone plays) are removed. /api/save_game reconciles at the end.
+    """
+    body = request.get_json(force=True) or {}
+    meta = body.get("meta") or {}
+    try:
+        season = int(meta["season"])
+        game = int(meta["game"])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"ok": False, "error": "season and game required"}), 400
+    opp = str(meta.get("opp", "") or "").strip()
+    gtype = str(meta.get("type", "REG") or "REG").strip()
+
+    rows = [event_row(season, game, gtype, opp, ev) for ev in body.get("events") or []]
+    rows = [r for r in rows if r is not None and r[-1] is not None]
+    changed = False
+    if rows:
+        queue_events(rows)
+        with LIVE_BOX_LOCK:
+            if live_box_follows(season, game):
+                box = LIVE_BOX
+                changed = live_box_for(season, game).add(rows) or LIVE_BOX is not box
+
+    retract = [str(i) for i in body.get("retract") or [] if i]
+    if retract:
+        # the retracted rows may still be queued
+        flush_events()
+        c = con()
+        with c:
+            c.executemany(
+                "delete from game_events where season=? and game=? and client_id=?",
+                [(season, game, i) for i in retract],
+            )
+        # a retraction only edits the box already tracking that game; the
+        # tracker retracts from the old game when its game number changes,
+        # and that must not pull the box back to it
+        with LIVE_BOX_LOCK:
+            if LIVE_BOX is not None and (LIVE_BOX.season, LIVE_BOX.game) == (season, game):
+                changed = LIVE_BOX.retract(retract) or changed
+
+    if changed:
+        publish("livebox")
+
+    return jsonify({"ok": True, "queued": len(rows), "retracted": len(retract)})
+
+
+# ---- live box score ----
+
+LIVE_BOX_COUNTS = ["2PM", "2PA", "3PM", "3PA", "FTM", "FTA", "OREB", "DREB", "AST", "STL", "BLK", "TOV", "FLS"]
+
+
+def clock_seconds(clock) -> int | None:
+    mins, _, secs = str(clock or "").strip().partition(":")
+    try:
+        return int(mins) * 60 + int(secs)
+    except ValueError:
+        return None
+
+
+class LiveBox:
+    """
+    running box score for the game being tracked, built from game_events rows
+    (see event_row) with O(1) work per event. it follows the tracker's rules:
+    a make also counts the attempt, and plus-minus and minutes go to whoever the
+    sub events put on the floor. undone plays are rare, so a retraction just
+    replays the remaining events.
+    """
+
+    def __init__(self, season: int, game: int):
+        self.season = season
+        self.game = game
+        self.rows: dict = {}
+        self.seq = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.players: dict[str, dict] = {}
+        self.on_floor: dict[str, int | None] = {}  # name -> clock at sub in
+        self.clock: int | None = None
+        self.period = ""
+        self.opp = ""
+        self.opp_points = 0
+
+    def player(self, name: str) -> dict:
+        p = self.players.get(name)
+        if p is None:
+            p = self.players[name] = {c: 0 for c in LIVE_BOX_COUNTS}
+            p["seconds"] = 0
+            p["plusMinus"] = 0
+        return p
+
+    def add(self, rows: list[tuple]) -> bool:
+        """applies the rows not seen yet; returns whether any were new"""
+        added = False
+        for row in rows:
+            key = row[11] if row[11] is not None else ("row", len(self.rows))
+            if key in self.rows:
+                continue
+            self.rows[key] = row
+            self.apply(row)
+            added = True
+        if added:
+            self.seq += 1
+        return added
+
+    def retract(self, ids: list[str]) -> bool:
+        """drops the given client ids; returns whether the box had any of them"""
+        removed = [i for i in ids if self.rows.pop(i, None) is not None]
+        if not removed:
+            return False
+        self.reset()
+        for row in self.rows.values():
+            self.apply(row)
+        self.seq += 1
+        return True
+
+    def sub_out(self, name: str, clock: int | None) -> None:
+        if name not in self.on_floor:
+            return
+        start = self.on_floor.pop(name)
+        if start is not None and clock is not None:
+            self.player(name)["seconds"] += start - clock
+
+    def apply(self, row: tuple) -> None:
+        period, clock, kind, name, other, code, points = row[4:11]
+        clock = clock_seconds(clock)
+        if clock is not None:
+            self.clock = clock
+        self.period = period or self.period
+        self.opp = row[3] or self.opp
+
+        if kind == "player" and name:
+            p = self.player(name)
+            if code in p:
+                p[code] += 1
+            made = {"2PM": ("2PA", 2), "3PM": ("3PA", 3), "FTM": ("FTA", 1)}.get(code)
+            if made:
+                p[made[0]] += 1
+                for on in self.on_floor:
+                    self.player(on)["plusMinus"] += made[1]
+        elif kind == "assist" and name:
+            self.player(name)["AST"] += 1
+        elif kind == "opp":
+            self.opp_points += int(points or 0)
+            for on in self.on_floor:
+                self.player(on)["plusMinus"] -= int(points or 0)
+        elif kind == "sub" and name:
+            if code == "SUBBED OUT":
+                self.sub_out(name, clock)
+                return
+            if code == "IN FOR" and other:
+                self.sub_out(other, clock)
+            self.player(name)
+            self.on_floor.setdefault(name, clock)
+
+    def payload(self) -> dict:
+        players = []
+        for name, p in self.players.items():
+            row = {"NAMES": name, **{c: p[c] for c in LIVE_BOX_COUNTS}}
+            row["FGM"] = p["2PM"] + p["3PM"]
+            row["FGA"] = p["2PA"] + p["3PA"]
+            row["REB"] = p["OREB"] + p["DREB"]
+            row["PTS"] = 2 * p["2PM"] + 3 * p["3PM"] + p["FTM"]
+            row["FG%"] = row["FGM"] / row["FGA"] if row["FGA"] else 0
+            row["FT%"] = p["FTM"] / p["FTA"] if p["FTA"] else 0
+            seconds = p["seconds"]
+            start = self.on_floor.get(name)
+            if start is not None and self.clock is not None:
+                seconds += start - self.clock
+            row["minutes"] = seconds
+            row["plusMinus"] = p["plusMinus"]
+            row["onFloor"] = name in self.on_floor
+            players.append(row)
+        return {
+            "ok": True,
+            "seq": self.seq,
+            "season": self.season,
+            "game": self.game,
+            "opp": self.opp,
+            "period": self.period,
+            "clock": self.clock,
+            "teamScore": sum(row["PTS"] for row in players),
+            "oppScore": self.opp_points,
+            "players": players,
+        }
+
+
+LIVE_BOX: LiveBox | None = None
+LIVE_BOX_LOCK = threading.Lock()
+
+
+def live_box_follows(season: int, game: int) -> bool:
+    """
+    whether new plays for (season, game) go to the live box. the box follows
+    the newest game that gets plays: an older game, from a stale tab or a
+    retried batch, never takes it back. a box whose plays were all retracted
+    (a mistyped game number) lets go to any game.
+    """
+    if LIVE_BOX is None or not LIVE_BOX.rows:
+        return True
+    return (season, game) >= (LIVE_BOX.season, LIVE_BOX.game)
+
+
+def live_box_for(season: int, game: int, reload: bool = False) -> LiveBox:
+    """
+    the box for (season, game), seeded from stored events when tracking
+    switches games. callers check live_box_follows() first
+    """
+    global LIVE_BOX
+    if reload or LIVE_BOX is None or (LIVE_BOX.season, LIVE_BOX.game) != (season, game):
+        flush_events()
+        box = LiveBox(season, game)
+        # keep seq moving across boxes so etags never repeat
+        box.seq = LIVE_BOX.seq + 1 if LIVE_BOX is not None else 0
+        cols = "season, game, type, opp, period, clock, event_kind, player, other_player, code, points, client_id"
+        box.add(con().execute(
+            f"select {cols} from game_events where season=? and game=? order by id",
+            (season, game),
+        ).fetchall())
+        LIVE_BOX = box
+    return LIVE_BOX
+
+
+def live_box_seq() -> int:
+    return LIVE_BOX.seq if LIVE_BOX is not None else 0
+
+
+def live_box_payload() -> dict:
+    with LIVE_BOX_LOCK:
+        if LIVE_BOX is None:
+            return {"ok": True, "seq": 0, "season": None, "game": None, "players": []}
+        return LIVE_BOX.payload()
+
+
+@app.get("/api/live_box")
+def get_live_box():
+    return state_response("livebox")
+
 
 # ---- save game ----
 
@@ -539,7 +1302,7 @@ DB_COLS = [
     "OPP","SEASON","GAME","NAMES",
     "2PM","2PA","3PM","3PA","FGM","FGA","FTM","FTA",
     "OREB","DREB","PTS","REB","AST","BLK","STL","TOV","FLS",
-    "FG%","TS%","FT%","2P%","3P%","GSC","TYPE"
+    "FG%","TS%","FT%","2P%","3P%","GSC","TYPE","ROLE"
 ]
 
 @app.post("/api/save_game")
@@ -588,6 +1351,7 @@ def save_game():
         r["GAME"] = game
         r["TYPE"] = gtype
         r["NAMES"] = name
+        r["ROLE"] = "player"
 
         for k in ["2PM","2PA","3PM","3PA","FGM","FGA","FTM","FTA","OREB","DREB",
                   "PTS","REB","AST","BLK","STL","TOV","FLS"]:
@@ -608,6 +1372,7 @@ def save_game():
     team_row["GAME"] = game
     team_row["TYPE"] = gtype
     team_row["NAMES"] = "Injury Reserves"
+    team_row["ROLE"] = "team"
     team_row["PTS"] = int(team_score)
 
     opp_row = blank_row()
@@ -616,19 +1381,33 @@ def save_game():
     opp_row["GAME"] = game
     opp_row["TYPE"] = gtype
     opp_row["NAMES"] = opp
+    opp_row["ROLE"] = "opponent"
     opp_row["PTS"] = int(opp_score)
 
+    # write out queued live events first, so they can't commit mid-save
+    flush_events()
+
     c = con()
     cur = c.cursor()
-    ensure_event_tables()
 
+    # a re-save can drop a player from the game; their cached profile has to
+    # go too, not just the profiles of the names in the new payload
+    replaced = {
+        row[0] for row in cur.execute(
+            "select distinct NAMES from InjuryReserves where SEASON=? and GAME=? and ROLE='player' and OPP=?",
+            (season, game, opp),
+        )
+    }
+
+    # a re-save replaces the game's rows; the summary triggers take the old
+    # player lines back out before the new ones are added
     cur.execute(
         """
         delete from InjuryReserves
         where SEASON=? and GAME=? and (
-          (NAMES='Injury Reserves' and OPP=?)
+          (ROLE in ('player', 'team') and OPP=?)
           or
-          (NAMES=? and OPP='Injury Reserves')
+          (ROLE='opponent' and NAMES=?)
         )
         """,
         (season, game, opp, opp),
@@ -672,44 +1451,41 @@ def save_game():
             ),
         )
 
-    cur.execute(
-        "DELETE FROM game_events WHERE season=? AND game=?",
-        (season, game),
-    )
-
-    for ev in events:
-        kind = str(ev.get("kind", "") or "").strip()
-        if not kind:
-            continue
+    # most events already arrived through /api/events; only reconcile here
+    final = [r for r in (event_row(season, game, gtype, opp, ev) for ev in events) if r is not None]
+    ids = [r[-1] for r in final]
+    stored = [
+        row[0] for row in cur.execute(
+            "SELECT client_id FROM game_events WHERE season=? AND game=? ORDER BY id",
+            (season, game),
+        )
+    ]
+    if all(ids) and stored == ids[:len(stored)]:
+        # the live rows are an in-order prefix of the final list, append the rest
+        cur.executemany(EVENT_INSERT, final[len(stored):])
+    else:
         cur.execute(
-            """
-            INSERT INTO game_events (
-                season, game, type, opp, period, clock,
-                event_kind, player, other_player, code, points
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                season,
-                game,
-                gtype,
-                opp,
-                str(ev.get("period", "") or "").strip(),
-                str(ev.get("clock", "") or "").strip(),
-                kind,
-                str(ev.get("player", "") or "").strip() or None,
-                str(ev.get("toPlayer", ev.get("otherPlayer", "")) or "").strip() or None,
-                str(ev.get("code", ev.get("action", "")) or "").strip() or None,
-                int(ev.get("points", 0) or 0),
-            ),
+            "DELETE FROM game_events WHERE season=? AND game=?",
+            (season, game),
         )
+        cur.executemany(EVENT_INSERT, final)
 
     c.commit()
-    c.close()
-
-    rebuild_json()
+    names = replaced | {r["NAMES"] for r in all_rows}
+    READ_CACHE.invalidate("roster", "games", *{f"player:{name}" for name in names})
+
+    # the saved events are the final word for the live box too, if it follows this game
+    with LIVE_BOX_LOCK:
+        follows = live_box_follows(season, game)
+        if follows:
+            live_box_for(season, game, reload=True)
+    if follows:
+        publish("livebox")
+
+    ticket = request_rebuild({(season, game)})
     return jsonify({
         "ok": True,
+        "buildTicket": ticket,
         "inserted": len(all_rows),
         "teamScore": team_score,
         "oppScore": opp_score,
@@ -717,4 +1493,5 @@ def save_game():
     })
 
 if __name__ == "__main__":
+    ensure_schema()
     app.run(port=5001, debug=True, use_reloader=False)
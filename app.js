@@ -45,10 +45,53 @@ const PAGE_META = {
   }
 };
 
+let manifestPromise = null;
+
+// data/manifest.json maps each generated file to a content hash, so unchanged
+// files can be fetched from a versioned URL and served from the browser cache
+function loadManifest(){
+  if (!manifestPromise) {
+    manifestPromise = fetch("data/manifest.json", { cache: "no-store" })
+      .then(res => res.ok ? res.json() : null)
+      .then(manifest => manifest?.files || {})
+      .catch(() => ({}));
+  }
+  return manifestPromise;
+}
+
+// builds run with --columnar store lists of records as
+// {"$columns": [...], "$values": [[column 0], [column 1], ...]}; turn them back
+// into plain row objects so the renderers see the same data either way
+function decodeColumnar(v){
+  if (Array.isArray(v)) return v.map(decodeColumnar);
+  if (!v || typeof v !== "object") return v;
+  if (Array.isArray(v.$columns)) {
+    const cols = v.$columns;
+    const values = v.$values;
+    const n = values.length ? values[0].length : 0;
+    const rows = new Array(n);
+    for (let i = 0; i < n; i++) {
+      const row = {};
+      for (let j = 0; j < cols.length; j++) {
+        const x = values[j][i];
+        row[cols[j]] = x !== null && typeof x === "object" ? decodeColumnar(x) : x;
+      }
+      rows[i] = row;
+    }
+    return rows;
+  }
+  for (const k of Object.keys(v)) v[k] = decodeColumnar(v[k]);
+  return v;
+}
+
 async function loadJSON(path){
-  const res = await fetch(path, { cache: "no-store" });
+  const files = await loadManifest();
+  const entry = files[path];
+  const res = entry
+    ? await fetch(`${path}?v=${entry.hash.slice(0, 16)}`)
+    : await fetch(path, { cache: "no-store" });
   if (!res.ok) throw new Error(`failed to load ${path}`);
-  return res.json();
+  return decodeColumnar(await res.json());
 }
 
 async function loadOptionalJSON(path, fallback){
@@ -350,41 +393,22 @@ function filterRowsBySearch(rows) {
   return rows.filter(r => String(r.NAMES || "").toLowerCase().includes(q));
 }
 
-async function getHighsLinkMap(rows) {
+// the build writes which game every career high came from, so the highs page
+// needs one extra request instead of loading every game file
+async function getHighsLinkMap() {
   if (state.page !== "highs") return null;
   const key = state.allTime ? "all" : `season_${state.season}`;
   if (state.highsLinkCache[key]) return state.highsLinkCache[key];
 
-  const seasons = state.allTime ? state.index.seasons : [state.season];
-  const baseKeys = rows && rows.length ? Object.keys(rows[0]) : [];
-  const statKeys = baseKeys.filter(k => !k.endsWith("_display") && k !== "NAMES" && k !== "rowColor" && k !== "GP");
-  const statDefs = statKeys.map(k => {
-    if (k === "Lowest GSC") return { key: k, source: "GSC", mode: "min" };
-    return { key: k, source: k, mode: "max" };
-  });
+  const path = state.allTime
+    ? "data/aggregates/highs_links_all.json"
+    : `data/aggregates/highs_links_by_season_${state.season}.json`;
 
-  const map = {};
-  for (const season of seasons) {
-    const games = state.index.seasonGames[season] || [];
-    for (const game of games) {
-      const payload = await loadJSON(`data/games/${season}_${game}.json`);
-      const players = payload.players || [];
-      for (const r of players) {
-        const name = r.NAMES;
-        if (!name || String(name).includes("Injury Reserves")) continue;
-        if (!map[name]) map[name] = {};
-        for (const def of statDefs) {
-          if (!(def.source in r)) continue;
-          const val = Number(r[def.source]);
-          if (!Number.isFinite(val)) continue;
-          const cur = map[name][def.key];
-          const better = !cur || (def.mode === "max" ? val > cur.value : val < cur.value);
-          if (better) {
-            map[name][def.key] = { value: val, season, game };
-          }
-        }
-      }
-    }
+  let map = {};
+  try {
+    map = await loadJSON(path);
+  } catch (_) {
+    // older builds have no links file; show plain values
   }
 
   state.highsLinkCache[key] = map;
@@ -1010,10 +1034,11 @@ async function renderAggregate(kind){
   } else {
     path = `data/aggregates/${kind}_by_season_${state.season}.json`;
   }
-  const rows = await loadJSON(path);
-  if (kind === "highs") {
-    state.highsLinkMap = await getHighsLinkMap(rows);
-  }
+  const [rows, highsLinkMap] = await Promise.all([
+    loadJSON(path),
+    kind === "highs" ? getHighsLinkMap() : null,
+  ]);
+  state.highsLinkMap = highsLinkMap;
 
   appendTeamPanTables(content, rows);
 }
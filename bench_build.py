@@ -0,0 +1,341 @@
+"""
+benchmark for the data/ build on synthetic archives.
+
+generates an ir_stats.db with the real schema at each size, runs the build
+stage by stage in a fresh process, and reports wall time, peak RSS, and
+output bytes per stage. results are saved as json so runs from different
+commits can be compared.
+
+    python bench_build.py --seasons 4 20 100 --out bench_build.json
+    python bench_build.py --seasons 4 20 --compare bench_build_old.json
+    python bench_build.py --seasons 100 --engine sql
+"""
+import argparse
+import json
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from migrate_db import migrate
+
+REPO = Path(__file__).resolve().parent
+
+SCHEMA = [
+    """
+    CREATE TABLE "InjuryReserves" (
+        "OPP" TEXT, "SEASON" INTEGER, "GAME" INTEGER, "NAMES" TEXT,
+        "2PM" TEXT, "2PA" TEXT, "3PM" TEXT, "3PA" TEXT, "FGM" TEXT, "FGA" TEXT,
+        "FTM" TEXT, "FTA" TEXT, "OREB" TEXT, "DREB" TEXT, "PTS" INTEGER,
+        "REB" TEXT, "AST" TEXT, "BLK" TEXT, "STL" TEXT, "TOV" TEXT, "FLS" TEXT,
+        "FG%" TEXT, "TS%" TEXT, "FT%" TEXT, "2P%" TEXT, "3P%" TEXT, "GSC" TEXT,
+        "TYPE" TEXT
+    )
+    """,
+    """
+    CREATE TABLE OpponentMeta (
+        opp text primary key,
+        color text
+    )
+    """,
+    """
+    CREATE TABLE game_player_stats (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        season INTEGER NOT NULL, game INTEGER NOT NULL, type TEXT, opp TEXT,
+        player TEXT NOT NULL,
+        minutes INTEGER DEFAULT 0, plus_minus INTEGER DEFAULT 0,
+        "2PM" INTEGER DEFAULT 0, "2PA" INTEGER DEFAULT 0, "3PM" INTEGER DEFAULT 0,
+        "3PA" INTEGER DEFAULT 0, FTM INTEGER DEFAULT 0, FTA INTEGER DEFAULT 0,
+        OREB INTEGER DEFAULT 0, DREB INTEGER DEFAULT 0, AST INTEGER DEFAULT 0,
+        STL INTEGER DEFAULT 0, BLK INTEGER DEFAULT 0, TOV INTEGER DEFAULT 0,
+        FLS INTEGER DEFAULT 0, FGM INTEGER DEFAULT 0, FGA INTEGER DEFAULT 0,
+        REB INTEGER DEFAULT 0, PTS INTEGER DEFAULT 0, "FG%" REAL DEFAULT 0,
+        "TS%" REAL DEFAULT 0, "FT%" REAL DEFAULT 0, GSC REAL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE player_bio (
+        name TEXT PRIMARY KEY,
+        height TEXT,
+        position TEXT
+    )
+    """,
+    """
+    CREATE TABLE game_events (
+        id integer primary key autoincrement,
+        season integer not null, game integer not null, type text, opp text,
+        period text, clock text, event_kind text not null,
+        player text, other_player text, code text, points integer default 0
+    )
+    """,
+]
+
+# seasons from this one on have minutes, plus/minus and play-by-play, like the real archive
+TRACKED_FROM = 4
+PLAYER_CODES = ["2PA", "2PM", "3PA", "3PM", "BLK", "DREB", "FLS", "FTA", "FTM", "OREB", "STL", "TOV"]
+
+
+def pct(made: int, att: int) -> str:
+    return f"{made / att * 100:.2f}%" if att else "0.00%"
+
+
+def player_line(rng: random.Random) -> dict:
+    p2a, p3a, fta = rng.randint(0, 16), rng.randint(0, 12), rng.randint(0, 6)
+    p2m, p3m, ftm = rng.randint(0, p2a), rng.randint(0, p3a), rng.randint(0, fta)
+    oreb, dreb = rng.randint(0, 5), rng.randint(0, 9)
+    ast, stl, blk, tov, fls = (rng.randint(0, n) for n in (7, 4, 3, 5, 5))
+    pts = 2 * p2m + 3 * p3m + ftm
+    fga = p2a + p3a
+    gsc = pts + 0.4 * (p2m + p3m) - 0.7 * fga - 0.4 * (fta - ftm) + 0.7 * oreb + 0.3 * dreb + stl + 0.7 * ast + 0.7 * blk - 0.4 * fls - tov
+    return {
+        "2PM": p2m, "2PA": p2a, "3PM": p3m, "3PA": p3a, "FGM": p2m + p3m, "FGA": fga,
+        "FTM": ftm, "FTA": fta, "OREB": oreb, "DREB": dreb, "PTS": pts, "REB": oreb + dreb,
+        "AST": ast, "BLK": blk, "STL": stl, "TOV": tov, "FLS": fls,
+        "FG%": pct(p2m + p3m, fga), "TS%": pct(pts, 2 * (fga + 0.44 * fta)), "FT%": pct(ftm, fta),
+        # sqlite has no negative zero, so "-0.00" would not survive the typed schema
+        "2P%": pct(p2m, p2a), "3P%": pct(p3m, p3a), "GSC": f"{gsc:.2f}".replace("-0.00", "0.00"),
+    }
+
+
+def generate_db(path: Path, seasons: int, seed: int = 7, migrated: bool = True) -> dict:
+    """
+    writes a synthetic archive with about the real archive's shape per season.
+    migrated=False leaves it in the original text schema, for builds from
+    commits that predate migrate_db.py
+    """
+    rng = random.Random(seed)
+    opps = [f"Opponent {i}" for i in range(30)]
+    pool = [f"Player {i}" for i in range(12 + 3 * seasons)]
+    stat_keys = list(player_line(rng))
+
+    con = sqlite3.connect(path)
+    for ddl in SCHEMA:
+        con.execute(ddl)
+    con.executemany("INSERT INTO OpponentMeta VALUES (?, ?)", [(o, f"#{rng.randrange(0xFFFFFF):06x}") for o in opps])
+    con.executemany(
+        "INSERT INTO player_bio VALUES (?, ?, ?)",
+        [(p, f"6'{rng.randint(0, 8)}", rng.choice(["PG", "SG", "SF", "PF", "C"])) for p in pool[::2]],
+    )
+
+    ir_cols = ["OPP", "SEASON", "GAME", "NAMES", *stat_keys, "TYPE"]
+    ir_sql = f"INSERT INTO InjuryReserves ({', '.join(json.dumps(c) for c in ir_cols)}) VALUES ({', '.join('?' * len(ir_cols))})"
+    ir_rows, gps_rows, events = [], [], []
+
+    roster = rng.sample(pool, 10)
+    for s in range(1, seasons + 1):
+        # a couple of players turn over every season
+        roster = roster[2:] + rng.sample([p for p in pool if p not in roster], 2)
+        games = [(-g, "PRE") for g in (2, 1)] + [(g, "REG") for g in range(1, 13)] + [(13, "FINAL")]
+        for gnum, gtype in games:
+            opp = rng.choice(opps)
+            lines = {p: player_line(rng) for p in rng.sample(roster, rng.randint(6, 9))}
+            team = {k: sum(l[k] for l in lines.values()) for k in stat_keys if not k.endswith("%") and k != "GSC"}
+            team.update({k: "0.00%" for k in stat_keys if k.endswith("%")}, GSC="0.00")
+            opp_pts = rng.randint(30, 90)
+
+            for name, line in lines.items():
+                ir_rows.append([opp, s, gnum, name, *(line[k] for k in stat_keys), gtype])
+            ir_rows.append([opp, s, gnum, "Injury Reserves", *(team[k] for k in stat_keys), gtype])
+            mirror = {k: "0" for k in stat_keys}
+            mirror["PTS"] = opp_pts
+            ir_rows.append(["Injury Reserves", s, gnum, opp, *(mirror[k] for k in stat_keys), gtype])
+
+            if s < TRACKED_FROM:
+                continue
+
+            for name, line in lines.items():
+                gps_rows.append((s, gnum, gtype, opp, name, rng.randint(300, 2400), rng.randint(-30, 30), line["PTS"]))
+
+            names = list(lines)
+            for i in range(rng.randint(150, 220)):
+                clock = f"{39 - i % 40:02d}:{rng.randint(0, 59):02d}"
+                period = "1ST" if i < 100 else "2ND"
+                roll = rng.random()
+                if roll < 0.7:
+                    events.append((s, gnum, gtype, opp, period, clock, "player", rng.choice(names), None, rng.choice(PLAYER_CODES), 0))
+                elif roll < 0.87:
+                    events.append((s, gnum, gtype, opp, period, clock, "opp", None, None, None, rng.choice([1, 2, 2, 2, 3])))
+                elif roll < 0.95:
+                    a, b = rng.sample(names, 2)
+                    events.append((s, gnum, gtype, opp, period, clock, "assist", a, b, None, 0))
+                else:
+                    a, b = rng.sample(names, 2)
+                    events.append((s, gnum, gtype, opp, period, clock, "sub", a, b, "IN FOR", 0))
+
+    con.executemany(ir_sql, ir_rows)
+    con.executemany(
+        "INSERT INTO game_player_stats (season, game, type, opp, player, minutes, plus_minus, PTS) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        gps_rows,
+    )
+    con.executemany(
+        "INSERT INTO game_events (season, game, type, opp, period, clock, event_kind, player, other_player, code, points) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        events,
+    )
+    con.commit()
+    # written in the archive's original text schema, then migrated like the real db
+    if migrated:
+        migrate(con)
+    con.close()
+    return {"rows": len(ir_rows), "game_player_stats": len(gps_rows), "events": len(events)}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kB on linux and bytes on macos
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_child(workdir: Path, engine: str = "pandas") -> dict:
+    """times each build stage in this process; the build writes into workdir/data"""
+    import os
+
+    os.chdir(workdir)
+    sys.path.insert(0, str(REPO))
+    t0 = time.perf_counter()
+    import build_data_from_sqlite as b
+
+    stages = []
+
+    def stage(name: str, fn, *args):
+        b.reset_written()
+        start = time.perf_counter()
+        result = fn(*args)
+        seconds = time.perf_counter() - start
+        written, _ = b.reset_written()
+        if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], dict):
+            written = result[0]
+        stages.append({
+            "stage": name,
+            "seconds": round(seconds, 4),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "files": len(written),
+            "bytes": sum(e["bytes"] for e in written.values()),
+        })
+        return result
+
+    stage("import", lambda: None)
+    stages[-1]["seconds"] = round(time.perf_counter() - t0, 4)
+
+    df, opp_meta, player_bio, game_events, gps = stage("load", b.load_from_sqlite, engine == "pandas")
+    b.DATA_DIR.mkdir(parents=True, exist_ok=True)
+    stage("fingerprints", lambda: (b.meta_fingerprint(opp_meta, player_bio), b.game_fingerprints(df, game_events)))
+    seasons, season_games, season_teams, opp_color_dict = stage("index", b.build_index, df, opp_meta)
+    aggregates = stage("cube", b.AGGREGATION_ENGINES[engine], df, game_events)
+
+    frames = {
+        "df": df,
+        **aggregates,
+        "player_bio": player_bio,
+        "game_events": game_events,
+        "db_path": None,
+        "gps": gps,
+        "opp_color_dict": opp_color_dict,
+    }
+    units = b.plan_units(df, seasons, season_games, season_teams, None, 1)
+    written = {}
+    for kind in dict.fromkeys(u[0] for u in units):
+        part = stage(kind, b.run_units, [u for u in units if u[0] == kind], frames)
+        written.update(part[0])
+    stage("manifest", b.write_manifest, written)
+
+    return {
+        "total_seconds": round(time.perf_counter() - t0, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "output_files": sum(s["files"] for s in stages),
+        "output_bytes": sum(s["bytes"] for s in stages),
+        "stages": stages,
+    }
+
+
+def bench_size(seasons: int, engine: str = "pandas") -> dict:
+    with tempfile.TemporaryDirectory(prefix="ir_bench_") as tmp:
+        workdir = Path(tmp)
+        start = time.perf_counter()
+        counts = generate_db(workdir / "ir_stats.db", seasons)
+        gen_seconds = time.perf_counter() - start
+
+        proc = subprocess.run(
+            [sys.executable, __file__, "--child", str(workdir), "--engine", engine],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise SystemExit(f"build failed for {seasons} seasons:\n{proc.stderr}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+
+        return {
+            "seasons": seasons,
+            "engine": engine,
+            **counts,
+            "db_bytes": (workdir / "ir_stats.db").stat().st_size,
+            "generate_seconds": round(gen_seconds, 4),
+            **result,
+        }
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def print_run(run: dict, baseline: dict | None = None) -> None:
+    print(
+        f"\n{run['seasons']} seasons: {run['rows']} rows, {run['events']} events, "
+        f"{run['total_seconds']:.2f} s, peak {run['peak_rss_mb']:.0f} MB, "
+        f"{run['output_files']} files / {run['output_bytes'] / 1024:.0f} kB"
+    )
+    base = {s["stage"]: s for s in (baseline or {}).get("stages", [])}
+    for s in run["stages"]:
+        line = f"  {s['stage']:<13}{s['seconds']:>9.3f} s{s['peak_rss_mb']:>9.0f} MB{s['bytes'] / 1024:>10.0f} kB"
+        if s["stage"] in base and base[s["stage"]]["seconds"] > 0:
+            line += f"   {s['seconds'] / base[s['stage']]['seconds']:>5.2f}x vs baseline"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seasons", type=int, nargs="+", default=[4, 20, 100])
+    parser.add_argument("--out", type=Path, default=Path("bench_build.json"))
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare stage times against")
+    parser.add_argument("--engine", default="pandas", help="aggregation engine of the build (pandas or sql)")
+    parser.add_argument("--child", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.engine)))
+        return
+
+    baseline = {}
+    if args.compare:
+        baseline = {r["seasons"]: r for r in json.loads(args.compare.read_text())["runs"]}
+
+    runs = []
+    for n in args.seasons:
+        run = bench_size(n, args.engine)
+        print_run(run, baseline.get(n))
+        runs.append(run)
+
+    import pandas as pd
+
+    results = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "runs": runs,
+    }
+    args.out.write_text(json.dumps(results, indent=2))
+    print(f"\nsaved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
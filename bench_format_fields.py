@@ -0,0 +1,131 @@
+"""
+micro-benchmark for format_fields() on a synthetic frame.
+
+compares the vectorized formatter in build_data_from_sqlite.py with the
+original per-cell lambda version, checks that every *_display string matches,
+and prints the timings.
+
+    python bench_format_fields.py --rows 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from build_data_from_sqlite import add_percentages, format_fields
+
+
+def format_fields_reference(d: pd.DataFrame, kind: str) -> pd.DataFrame:
+    # the per-cell implementation format_fields() replaced
+    d = d.copy()
+    pct_cols = ["FG%", "TS%", "2P%", "3P%", "FT%"]
+
+    for c in pct_cols:
+        if c in d.columns:
+            d[c + "_display"] = (d[c] * 100).round(2).map(lambda x: f"{x:.2f}%")
+
+    for c in d.columns:
+        if c in ["NAMES", "OPP", "SEASON", "GAME", "TYPE", "rowColor"]:
+            continue
+        if c.endswith("_display"):
+            continue
+        if c in pct_cols:
+            continue
+
+        if c == "MIN":
+            def fmt_min(x):
+                try:
+                    x = int(x)
+                except ValueError:
+                    return "0:00"
+                m = x // 60
+                s = x % 60
+                return f"{m}:{s:02d}"
+
+            d[c + "_display"] = d[c].fillna(0).map(fmt_min)
+            continue
+
+        if pd.api.types.is_numeric_dtype(d[c]):
+            if c == "GP":
+                d[c + "_display"] = d[c].fillna(0).astype(int).map(lambda x: f"{x}")
+            elif c == "GSC":
+                d[c + "_display"] = d[c].round(2).map(lambda x: f"{x:.2f}")
+            elif c == "Lowest GSC":
+                d[c + "_display"] = d[c].round(2).map(lambda x: f"{x:.2f}")
+            else:
+                if kind == "avg":
+                    d[c + "_display"] = d[c].round(2).map(lambda x: f"{x:.2f}")
+                elif kind == "game":
+                    d[c + "_display"] = d[c].fillna(0).map(
+                        lambda x: f"{int(x)}" if float(x).is_integer() else f"{x:.2f}"
+                    )
+                else:
+                    d[c + "_display"] = d[c].fillna(0).map(lambda x: f"{int(round(x))}")
+
+    return d
+
+
+def synthetic_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    counts = ["2PM", "2PA", "3PM", "3PA", "FGM", "FGA", "FTM", "FTA",
+              "O REB", "D REB", "PTS", "REB", "AST", "BLK", "STL", "TOV", "FLS"]
+
+    d = pd.DataFrame({
+        "NAMES": rng.choice(["Daniel Monitto", "Jack Groves", "Zack Johnston"], rows),
+        "SEASON": rng.integers(1, 5, rows),
+        "GAME": rng.integers(-3, 17, rows),
+    })
+    for c in counts:
+        d[c] = rng.integers(0, 30, rows).astype(float)
+
+    # attempts like 32 or 160 give exact ties in the percentage columns,
+    # which are object dtype and so round like python's round()
+    for c in ["2PA", "3PA", "FGA", "FTA"]:
+        d[c] = rng.choice([0, 8, 16, 32, 40, 64, 80, 160, 320, 3, 7, 11], rows).astype(float)
+
+    # averages and edge cases: halves, tiny negatives, missing values
+    d["AST"] = rng.integers(0, 4000, rows) / 8
+    d["GSC"] = rng.normal(5, 8, rows).round(3)
+    d.loc[d.index[::97], "GSC"] = -0.001
+    d["MIN"] = rng.integers(-120, 2400, rows).astype(float)
+    d["PM"] = rng.integers(-30, 30, rows) / 3
+    d.loc[d.index[::53], "PM"] = np.nan
+    d["GP"] = rng.integers(1, 40, rows)
+    d["Lowest GSC"] = rng.normal(0, 5, rows)
+    return add_percentages(d)
+
+
+def bench(fn, d: pd.DataFrame, kind: str, repeat: int) -> tuple[float, pd.DataFrame]:
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(d, kind)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    d = synthetic_frame(args.rows)
+
+    for kind in ["avg", "tot", "highs", "game"]:
+        t_ref, ref = bench(format_fields_reference, d, kind, args.repeat)
+        t_new, new = bench(format_fields, d, kind, args.repeat)
+
+        display = [c for c in ref.columns if c.endswith("_display")]
+        assert list(ref.columns) == list(new.columns), kind
+        for c in display:
+            mismatch = ref[c].astype(object) != new[c].astype(object)
+            assert not mismatch.any(), f"{kind} {c}: {ref[c][mismatch].iloc[0]!r} != {new[c][mismatch].iloc[0]!r}"
+
+        print(f"{kind:>5}: reference {t_ref * 1000:8.1f} ms   vectorized {t_new * 1000:8.1f} ms   {t_ref / t_new:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
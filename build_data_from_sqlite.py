@@ -1,14 +1,60 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import itertools
+import importlib.util
+import os
 import sqlite3
+import sys
 import json
 import re
+from collections import deque
+from functools import lru_cache, partial
 from pathlib import Path
 
-import pandas as pd
+from migrate_db import migrate
+
+
+def lazy_import(name: str):
+    """
+    returns module name, but only executes it on first attribute access, so a
+    build that finds nothing to do exits without loading pandas / numpy.
+    None when the module is not installed.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return None
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+brotli = lazy_import("brotli")  # optional, only used for the .br siblings of --compact
 
 DB_PATH = Path("ir_stats.db")  # put your db in project root with this name
 OUT_ROOT = Path(".")
 DATA_DIR = OUT_ROOT / "data"
 
+# per-game hashes from the last build, used by --incremental
+BUILD_STATE_PATH = DATA_DIR / "build_state.json"
+BUILD_STATE_VERSION = 1
+
+# hash of every row the build reads, from the last completed build, so
+# --incremental can stop before loading anything when nothing changed
+SOURCE_STATE_PATH = DATA_DIR / "source_state.json"
+
+# content hash and size of every published file, for caching and deploys
+MANIFEST_PATH = DATA_DIR / "manifest.json"
+MANIFEST_VERSION = 1
+
 COLUMNS_AVG = [
     "MIN", "PM", "2PM", "2PA", "3PM", "3PA", "FGM", "FGA", "FTM", "FTA",
     "O REB", "D REB", "PTS", "REB", "AST", "BLK", "STL",
@@ -48,18 +94,181 @@ def slugify(s: str) -> str:
     return s or "team"
 
 
-def write_json(path: Path, obj) -> None:
+# files written by the current process since the last reset: site path -> manifest entry
+_WRITTEN: dict[str, dict] = {}
+_CHANGED: set[str] = set()
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """
+    writes data unless the file already holds exactly these bytes, so unchanged
+    outputs keep their mtime. returns True when the file was written.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2))
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.write_bytes(data)
+    return True
+
+
+# --compact writes minified json plus precompressed .gz / .br siblings,
+# --columnar stores lists of records as column arrays
+_OUTPUT = {"compact": False, "columnar": False}
+COMPRESSED_SUFFIXES = [".gz", ".br"]
+
+
+def set_output(compact: bool = False, columnar: bool = False) -> None:
+    _OUTPUT.update(compact=compact, columnar=columnar)
+
+
+def output_mode() -> str:
+    return "+".join(k for k, v in _OUTPUT.items() if v) or "pretty"
+
+
+def to_columnar(obj):
+    """
+    replaces every list of records that share the same keys with
+    {"$columns": [...], "$values": [[column 0], [column 1], ...]}.
+    from_columnar() and loadJSON() in app.js / player.js undo it.
+    """
+    if isinstance(obj, dict):
+        return {k: to_columnar(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        if obj and all(isinstance(r, dict) for r in obj):
+            cols = list(obj[0])
+            if all(list(r) == cols for r in obj):
+                return {
+                    "$columns": cols,
+                    "$values": [[to_columnar(r[c]) for r in obj] for c in cols],
+                }
+        return [to_columnar(v) for v in obj]
+    return obj
+
+
+def from_columnar(obj):
+    if isinstance(obj, dict):
+        if "$columns" in obj:
+            cols, values = obj["$columns"], obj["$values"]
+            return [
+                {c: from_columnar(values[j][i]) for j, c in enumerate(cols)}
+                for i in range(len(values[0]))
+            ]
+        return {k: from_columnar(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [from_columnar(v) for v in obj]
+    return obj
+
+
+def encode_json(obj, compact: bool = False) -> bytes:
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def write_compressed(path: Path, data: bytes) -> None:
+    # mtime=0 keeps the gzip bytes stable between builds
+    write_if_changed(path.with_name(path.name + ".gz"), gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_if_changed(path.with_name(path.name + ".br"), brotli.compress(data, quality=11))
+
+
+def remove_compressed(path: Path) -> None:
+    # a pretty build must not leave stale siblings from an earlier --compact build
+    for suffix in COMPRESSED_SUFFIXES:
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+def write_json(path: Path, obj) -> None:
+    if _OUTPUT["columnar"]:
+        obj = to_columnar(obj)
+    data = encode_json(obj, _OUTPUT["compact"])
+    key = path.relative_to(OUT_ROOT).as_posix()
+    if write_if_changed(path, data):
+        _CHANGED.add(key)
+    if _OUTPUT["compact"]:
+        write_compressed(path, data)
+    else:
+        remove_compressed(path)
+    _WRITTEN[key] = {"hash": hashlib.sha256(data).hexdigest(), "bytes": len(data)}
+
+
+def reset_written() -> tuple[dict, set]:
+    written, changed = dict(_WRITTEN), set(_CHANGED)
+    _WRITTEN.clear()
+    _CHANGED.clear()
+    return written, changed
+
+
+def load_manifest() -> dict:
+    try:
+        return json.loads(MANIFEST_PATH.read_text()).get("files", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def write_manifest(files: dict) -> None:
+    manifest = {"version": MANIFEST_VERSION, "files": dict(sorted(files.items()))}
+    data = encode_json(manifest, _OUTPUT["compact"])
+    write_if_changed(MANIFEST_PATH, data)
+    if _OUTPUT["compact"]:
+        write_compressed(MANIFEST_PATH, data)
+    else:
+        remove_compressed(MANIFEST_PATH)
+
+
+PAGE_TYPES = {
+    "index.json": "overview",
+    "manifest.json": "overview",
+    "games": "game",
+    "aggregates": "aggregates",
+    "vs": "vs",
+    "players": "player",
+}
+
+
+def payload_report(files: dict) -> list[dict]:
+    """
+    bytes per page type for every published file: indented records json (the
+    default build), the file as written, and the .gz / .br siblings.
+    """
+    totals = {}
+    for key in [*files, MANIFEST_PATH.relative_to(OUT_ROOT).as_posix()]:
+        path = OUT_ROOT / key
+        data = path.read_bytes()
+        page = PAGE_TYPES.get(Path(key).relative_to("data").parts[0], "other")
+        t = totals.setdefault(page, {"type": page, "files": 0, "pretty": 0, "written": 0, "gzip": 0, "brotli": 0})
+        t["files"] += 1
+        t["pretty"] += len(encode_json(from_columnar(json.loads(data))))
+        t["written"] += len(data)
+        for suffix, col in [(".gz", "gzip"), (".br", "brotli")]:
+            sibling = path.with_name(path.name + suffix)
+            t[col] += sibling.stat().st_size if sibling.exists() else 0
+    order = ["overview", "game", "aggregates", "vs", "player", "other"]
+    return sorted(totals.values(), key=lambda t: order.index(t["type"]))
+
+
+def print_payload_report(rows: list[dict]) -> None:
+    cols = ["pretty", "written"]
+    if _OUTPUT["compact"]:
+        cols += ["gzip"] + (["brotli"] if brotli is not None else [])
+    print(f"{'page type':<12}{'files':>7}" + "".join(f"{c:>11}" for c in cols))
+    for r in rows + [{"type": "total", **{k: sum(r[k] for r in rows) for k in ["files"] + cols}}]:
+        print(f"{r['type']:<12}{r['files']:>7}" + "".join(f"{r[c] / 1024:>9.1f}kB" for c in cols))
+    if _OUTPUT["compact"] and brotli is None:
+        print("note: brotli is not installed, so no .br files were written (pip install brotli)")
 
 
 def safe_div(a, b):
-    b2 = b.copy().replace(0, pd.NA)
+    b2 = b.replace(0, pd.NA)
     return a / b2
 
 
 def add_percentages(d: pd.DataFrame) -> pd.DataFrame:
-    d = d.copy()
+    # only adds / replaces whole columns, so a shallow copy is enough
+    d = d.copy(deep=False)
     d["FG%"] = safe_div(d["FGM"], d["FGA"])
     d["TS%"] = safe_div(d["PTS"], (2 * (d["FGA"] + 0.44 * d["FTA"])))
     d["2P%"] = safe_div(d["2PM"], d["2PA"])
@@ -69,13 +278,98 @@ def add_percentages(d: pd.DataFrame) -> pd.DataFrame:
         d[c] = d[c].fillna(0.0)
     return d
 
+# display strings for 0..N-1 are looked up instead of formatted cell by cell
+_TABLE_SIZE = 100_000
+
+
+@lru_cache(maxsize=None)
+def _int_table() -> np.ndarray:
+    return np.array([str(i) for i in range(_TABLE_SIZE)], dtype=object)
+
+
+@lru_cache(maxsize=None)
+def _cents_table(suffix: str) -> np.ndarray:
+    return np.array([f"{i // 100}.{i % 100:02d}{suffix}" for i in range(_TABLE_SIZE)], dtype=object)
+
+
+@lru_cache(maxsize=None)
+def _min_table() -> np.ndarray:
+    return np.array([f"{i // 60}:{i % 60:02d}" for i in range(_TABLE_SIZE)], dtype=object)
+
+
+def _lookup(idx: np.ndarray, table: np.ndarray, fallback) -> np.ndarray:
+    out = np.empty(len(idx), dtype=object)
+    hit = (idx >= 0) & (idx < len(table))
+    out[hit] = table[idx[hit]]
+    if not hit.all():
+        out[~hit] = [fallback(int(v)) for v in idx[~hit]]
+    return out
+
+
+def _values(col: pd.Series) -> np.ndarray:
+    return col.to_numpy(dtype=float, na_value=np.nan)
+
+
+def _fmt_int(x: np.ndarray) -> np.ndarray:
+    n = x.astype(np.int64)
+    out = _lookup(np.abs(n), _int_table(), str)
+    neg = n < 0
+    out[neg] = ["-" + v for v in out[neg]]
+    return out
+
+
+def _cents(col: pd.Series) -> np.ndarray:
+    """
+    col.round(2) * 100 as whole floats (sign kept for "-0.00"). float columns
+    round like np.round; object columns round like python's round(), which
+    works on the exact binary value, so near-ties are settled by it.
+    """
+    x = _values(col)
+    cents = np.rint(x * 100)
+    if col.dtype == object:
+        frac = np.abs(x * 100 - np.trunc(x * 100))
+        tie = np.abs(frac - 0.5) < 1e-6
+        cents[tie] = np.rint(np.array([round(v, 2) for v in x[tie]], dtype=float) * 100)
+    return cents
+
+
+def _fmt_fixed2(cents: np.ndarray, suffix: str = "") -> np.ndarray:
+    # same strings as f"{x:.2f}" for x = cents / 100
+    out = np.empty(len(cents), dtype=object)
+    finite = np.isfinite(cents)
+
+    whole = np.abs(cents[finite]).astype(np.int64)
+    out[finite] = _lookup(whole, _cents_table(suffix), lambda c: f"{c // 100}.{c % 100:02d}{suffix}")
+
+    neg = finite & np.signbit(cents)
+    out[neg] = ["-" + v for v in out[neg]]
+
+    out[~finite] = [f"{v:.2f}{suffix}" for v in cents[~finite]]
+    return out
+
+
+def _fmt_min(x: np.ndarray) -> np.ndarray:
+    # seconds -> m:ss, truncating like int() and flooring like // and %
+    secs = np.trunc(x).astype(np.int64)
+    return _lookup(secs, _min_table(), lambda v: f"{v // 60}:{v % 60:02d}")
+
+
+def _fmt_game(x: np.ndarray) -> np.ndarray:
+    # whole numbers print as ints, anything else with 2 decimals
+    out = np.empty(len(x), dtype=object)
+    whole = np.isfinite(x) & (x == np.floor(x))
+    out[whole] = _fmt_int(x[whole])
+    out[~whole] = [f"{v:.2f}" for v in x[~whole]]
+    return out
+
+
 def format_fields(d: pd.DataFrame, kind: str) -> pd.DataFrame:
-    d = d.copy()
+    d = d.copy(deep=False)
     pct_cols = ["FG%", "TS%", "2P%", "3P%", "FT%"]
 
     for c in pct_cols:
         if c in d.columns:
-            d[c + "_display"] = (d[c] * 100).round(2).map(lambda x: f"{x:.2f}%")
+            d[c + "_display"] = _fmt_fixed2(_cents(d[c] * 100), "%")
 
     for c in d.columns:
         if c in ["NAMES", "OPP", "SEASON", "GAME", "TYPE", "rowColor"]:
@@ -87,55 +381,65 @@ def format_fields(d: pd.DataFrame, kind: str) -> pd.DataFrame:
 
         # special formatting for minutes (stored as seconds)
         if c == "MIN":
-            def fmt_min(x):
-                try:
-                    x = int(x)
-                except ValueError:
-                    return "0:00"
-                m = x // 60
-                s = x % 60
-                return f"{m}:{s:02d}"
-
-            d[c + "_display"] = d[c].fillna(0).map(fmt_min)
+            d[c + "_display"] = _fmt_min(_values(d[c].fillna(0)))
             continue
 
         if pd.api.types.is_numeric_dtype(d[c]):
             if c == "GP":
-                d[c + "_display"] = d[c].fillna(0).astype(int).map(lambda x: f"{x}")
+                d[c + "_display"] = _fmt_int(_values(d[c].fillna(0)))
             elif c == "GSC":
-                d[c + "_display"] = d[c].round(2).map(lambda x: f"{x:.2f}")
+                d[c + "_display"] = _fmt_fixed2(_cents(d[c]))
             elif c == "Lowest GSC":
-                d[c + "_display"] = d[c].round(2).map(lambda x: f"{x:.2f}")
+                d[c + "_display"] = _fmt_fixed2(_cents(d[c]))
             else:
                 if kind == "avg":
-                    d[c + "_display"] = d[c].round(2).map(lambda x: f"{x:.2f}")
+                    d[c + "_display"] = _fmt_fixed2(_cents(d[c]))
                 elif kind == "game":
-                    d[c + "_display"] = d[c].fillna(0).map(
-                        lambda x: f"{int(x)}" if float(x).is_integer() else f"{x:.2f}"
-                    )
+                    d[c + "_display"] = _fmt_game(_values(d[c].fillna(0)))
                 else:
-                    d[c + "_display"] = d[c].fillna(0).map(lambda x: f"{int(round(x))}")
+                    d[c + "_display"] = _fmt_int(np.rint(_values(d[c].fillna(0))))
 
     return d
 
-def calc_averages(player_data: pd.DataFrame) -> pd.DataFrame:
-    cols = [c for c in COLUMNS_AVG if c in player_data.columns]
+def gsc_means(cells: pd.DataFrame) -> pd.Series:
+    """
+    GSC average per player, as groupby().mean() over the rows themselves.
+    GSC is the only float stat, so a sum of cell sums can round differently;
+    the rows go back into load order and are summed the way the row-level
+    mean sums them.
+    """
+    if cells.empty:
+        return pd.Series(dtype=np.float64)
+    ords = np.concatenate(cells["GSC:ord"].tolist())
+    order = np.argsort(ords, kind="stable")
+    values = np.concatenate(cells["GSC:rows"].tolist())[order]
+    names = np.repeat(cells["NAMES"].to_numpy(), cells["GSC:ord"].map(len).to_numpy())[order]
+    return pd.Series(values).groupby(names).mean()
+
+
+def calc_averages(cells: pd.DataFrame, stats: list[str] = COLUMNS_SUM) -> pd.DataFrame:
+    cols = [c for c in COLUMNS_AVG if c in stats]
+    g = cells.groupby("NAMES")
+    sums = g[[f"{c}:sum" for c in cols]].sum()
+    counts = g[[f"{c}:cnt" for c in cols]].sum()
 
     # normal averages
-    g = player_data.groupby("NAMES")[cols].mean().reset_index()
+    avg = pd.DataFrame(sums.to_numpy() / counts.to_numpy(), index=sums.index, columns=cols)
+    if "GSC" in cols:
+        avg["GSC"] = gsc_means(cells).reindex(avg.index)
+    avg = avg.reset_index()
 
     # total games
-    games = player_data.groupby("NAMES").size().reset_index(name="GP")
+    games = g["n"].sum().reset_index(name="GP")
 
-    out = g.merge(games, on="NAMES", how="left")
+    out = avg.merge(games, on="NAMES", how="left")
 
     # ---- special handling for MIN and PM ----
     for special in ["MIN", "PM"]:
-        if special in player_data.columns:
+        if special in stats:
+            nz = g[f"{special}:nz"].sum()
             tracked = (
-                player_data[player_data[special] != 0]
-                .groupby("NAMES")[special]
-                .mean()
+                (sums[f"{special}:sum"] / nz)[nz > 0]
                 .reset_index(name=f"{special}_true_avg")
             )
 
@@ -151,32 +455,38 @@ def calc_averages(player_data: pd.DataFrame) -> pd.DataFrame:
     return format_fields(out, "avg")
 
 
-def calc_totals(player_data: pd.DataFrame) -> pd.DataFrame:
-    cols = [c for c in COLUMNS_SUM if c in player_data.columns]
-    totals = player_data.groupby("NAMES").agg({c: "sum" for c in cols}).reset_index()
-    totals = add_percentages(totals)
-    gsc_avg = player_data.groupby("NAMES")["GSC"].mean().reset_index(name="GSC_AVG")
+def calc_totals(cells: pd.DataFrame, stats: list[str] = COLUMNS_SUM) -> pd.DataFrame:
+    cols = [c for c in COLUMNS_SUM if c in stats]
+    g = cells.groupby("NAMES")
+    totals = g[[f"{c}:sum" for c in cols]].sum()
+    totals.columns = cols
+    totals = add_percentages(totals.reset_index())
+    n = g["n"].sum()
+    gsc_avg = gsc_means(cells).reindex(n.index).rename_axis("NAMES").reset_index(name="GSC_AVG")
     totals = totals.merge(gsc_avg, on="NAMES", how="left")
     totals["GSC"] = totals["GSC_AVG"]
     totals = totals.drop(columns=["GSC_AVG"])
-    games = player_data.groupby("NAMES").size().reset_index(name="GP")
+    games = n.reset_index(name="GP")
     out = totals.merge(games, on="NAMES", how="left")
     out["rowColor"] = out["NAMES"].map(lambda x: COLOR_MAP.get(x, "#A6C9EC"))
     return format_fields(out, "tot")
 
 
-def calc_highs(player_data: pd.DataFrame) -> pd.DataFrame:
+def calc_highs(cells: pd.DataFrame, stats: list[str] = COLUMNS_SUM) -> pd.DataFrame:
     # only use columns that exist
     base_cols = COLUMNS_SUM + ["GSC"]
-    cols = [c for c in base_cols if c in player_data.columns]
+    cols = [c for c in base_cols if c in stats]
 
-    highs = player_data.groupby("NAMES")[cols].max().reset_index()
+    g = cells.groupby("NAMES")
+    maxes = g[[f"{c}:max" for c in dict.fromkeys(cols)]].max()
+    maxes.columns = list(dict.fromkeys(cols))
+    highs = maxes[cols].reset_index()
 
-    if "GSC" in player_data.columns:
-        lowest_gsc = player_data.groupby("NAMES")["GSC"].min().reset_index(name="Lowest GSC")
+    if "GSC" in stats:
+        lowest_gsc = g["GSC:min"].min().reset_index(name="Lowest GSC")
         highs = highs.merge(lowest_gsc, on="NAMES", how="left")
 
-    games = player_data.groupby("NAMES").size().reset_index(name="GP")
+    games = g["n"].sum().reset_index(name="GP")
     out = highs.merge(games, on="NAMES", how="left")
 
     out["rowColor"] = out["NAMES"].map(lambda x: COLOR_MAP.get(x, "#A6C9EC"))
@@ -191,22 +501,96 @@ def calc_highs(player_data: pd.DataFrame) -> pd.DataFrame:
 def filter_min_games(df: pd.DataFrame, min_games: int = 3) -> pd.DataFrame:
     if "GP" not in df.columns:
         return df
-    return df[df["GP"] >= min_games].copy()
+    return df[df["GP"] >= min_games]
 
 
 def exclude_injury_opp(d: pd.DataFrame) -> pd.DataFrame:
-    return d[~d["OPP"].astype(str).str.contains("Injury Reserves", case=False, na=False)].copy()
+    return d[d["ROLE"] != "opponent"]
 
-def load_from_sqlite():
-    con = sqlite3.connect(DB_PATH)
+EVENT_COLUMNS = [
+    "season", "game", "type", "opp", "period", "clock",
+    "event_kind", "player", "other_player", "code", "points", "id"
+]
+EVENTS_SQL = f"SELECT {', '.join(EVENT_COLUMNS)} FROM game_events"
+
+
+def query_rows(con: sqlite3.Connection, sql: str, params=()) -> tuple[list[str], list[tuple]]:
+    cur = con.execute(sql, params)
+    return [d[0] for d in cur.description], cur.fetchall()
+
+
+def rows_frame(columns: list[str], rows: list[tuple]) -> pd.DataFrame:
+    # the same construction read_sql_query uses, so frames rebuilt from
+    # cached rows get exactly the dtypes of a fresh load
+    return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+
+def read_game_rows(con: sqlite3.Connection, games: set | None = None, events: bool = True) -> dict:
+    """
+    raw InjuryReserves, game_player_stats and game_events rows as
+    (columns, rows), for every game or only the (season, game) pairs in games.
+    _rowid keeps table order. events=False leaves game_events out.
+    """
+    where, params = "", []
+    if games is not None:
+        where = " WHERE ({}, {}) IN (VALUES " + ", ".join(["(?, ?)"] * len(games)) + ")"
+        params = [int(x) for key in sorted(games) for x in key]
+
+    tables = {
+        "ir": query_rows(
+            con, "SELECT rowid AS _rowid, * FROM InjuryReserves" + where.format("SEASON", "GAME"), params
+        ),
+        "gps": query_rows(con, """
+            SELECT rowid AS _rowid, season, game, player, minutes, plus_minus
+            FROM game_player_stats
+        """ + where.format("season", "game"), params),
+    }
 
-    df = pd.read_sql_query("SELECT * FROM InjuryReserves", con)
+    if not events:
+        return tables
+    try:
+        tables["events"] = query_rows(con, EVENTS_SQL + where.format("season", "game") + " ORDER BY id ASC", params)
+    except sqlite3.Error:
+        tables["events"] = (EVENT_COLUMNS, [])
 
-    gps = pd.read_sql_query("""
-        SELECT season, game, player, minutes, plus_minus
-        FROM game_player_stats
-    """, con)
+    return tables
 
+
+def read_season_events(db_path: Path | None, s) -> pd.DataFrame:
+    """one season's game_events, for builds that did not load them all up front"""
+    con = open_db(db_path)
+    try:
+        rows = query_rows(con, EVENTS_SQL + " WHERE season = ? ORDER BY id ASC", (int(s),))
+    except sqlite3.Error:
+        rows = (EVENT_COLUMNS, [])
+    finally:
+        con.close()
+    return prepare_events(rows_frame(*rows))
+
+
+def event_digests(db_path: Path | None) -> dict[str, str]:
+    """
+    a sha1 per game of its game_events rows, streamed from sqlite in id order.
+    stands in for the frame hashes in game_fingerprints() when the events
+    were not loaded.
+    """
+    con = open_db(db_path)
+    digests = {}
+    try:
+        cur = con.execute(EVENTS_SQL + " ORDER BY season, game, id")
+        for (season, game), rows in itertools.groupby(cur, key=lambda r: (r[0], r[1])):
+            h = hashlib.sha1()
+            for row in rows:
+                h.update(repr(row).encode())
+            digests[f"{int(season)}_{int(game)}"] = h.hexdigest()
+    except sqlite3.Error:
+        pass
+    finally:
+        con.close()
+    return digests
+
+
+def read_meta(con: sqlite3.Connection):
     opp_meta = pd.read_sql_query("""
         SELECT opp, color
         FROM OpponentMeta
@@ -217,20 +601,13 @@ def load_from_sqlite():
         FROM player_bio
     """, con)
 
-    try:
-        game_events = pd.read_sql_query("""
-            SELECT season, game, type, opp, period, clock,
-                   event_kind, player, other_player, code, points, id
-            FROM game_events
-            ORDER BY id ASC
-        """, con)
-    except Exception:
-        game_events = pd.DataFrame(columns=[
-            "season", "game", "type", "opp", "period", "clock",
-            "event_kind", "player", "other_player", "code", "points", "id"
-        ])
+    return opp_meta, player_bio
 
-    con.close()
+
+def prepare_frames(ir: pd.DataFrame, gps: pd.DataFrame):
+    """turns the raw rows into the typed df / gps frames the build uses"""
+    df = ir.sort_values("_rowid", kind="stable").drop(columns=["_rowid"]).reset_index(drop=True)
+    gps = gps.sort_values("_rowid", kind="stable").drop(columns=["_rowid"]).reset_index(drop=True)
 
     gps = gps.rename(columns={
         "season": "SEASON",
@@ -256,30 +633,90 @@ def load_from_sqlite():
         "TOV", "FLS", "GSC", "MIN", "PM",
     ]
 
+    # InjuryReserves stats are typed, so to_numeric is only needed for columns
+    # that came back all NULL (object dtype)
     for c in numeric_cols:
         if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0)
+            if not pd.api.types.is_numeric_dtype(df[c]):
+                df[c] = pd.to_numeric(df[c], errors="coerce")
+            df[c] = df[c].fillna(0)
 
-    return df, opp_meta, player_bio, game_events
+    return lean_frame(df), gps
 
 
-def build_assist_links(events: pd.DataFrame, seasons: list[int]) -> None:
-    assists = events[events["event_kind"].astype(str) == "assist"].copy()
-    if assists.empty:
-        write_json(DATA_DIR / "assists" / "assists_all.json", [])
-        for s in seasons:
-          write_json(DATA_DIR / "assists" / f"assists_by_season_{s}.json", [])
-        return
+# text columns with a handful of distinct values, kept as categoricals. they
+# hash, group and serialize exactly like the plain strings, so outputs and
+# build_state.json do not change. the stats stay float64: they are written
+# to the json as-is (6.0, 0.2857142857142857), so a narrower dtype would
+# change the published bytes.
+CATEGORY_COLS = [
+    "ROLE", "NAMES", "OPP", "TYPE",
+    "type", "opp", "period", "clock", "event_kind", "player", "other_player", "code",
+]
+
+
+def lean_frame(d: pd.DataFrame) -> pd.DataFrame:
+    return d.astype({c: "category" for c in CATEGORY_COLS if c in d.columns})
+
+
+def prepare_events(events: pd.DataFrame) -> pd.DataFrame:
+    """game_events with categorical text and the smallest unsigned ints that fit"""
+    events = lean_frame(events)
+    for c in ["season", "game", "points", "id"]:
+        # only downcasts columns without negatives (preseason games are < 0),
+        # so the row hashes stay the same
+        if pd.api.types.is_integer_dtype(events[c]):
+            events[c] = pd.to_numeric(events[c], downcast="unsigned")
+    return events
+
+
+def open_db(path: Path | None = None) -> sqlite3.Connection:
+    """connects and brings the schema up to date (typed InjuryReserves with ROLE)"""
+    con = sqlite3.connect(path or DB_PATH)
+    migrate(con)
+    # names, opponents, codes and clocks repeat on every row; decoding each
+    # distinct value once makes the fetched rows share one str per value
+    con.text_factory = lru_cache(maxsize=None)(bytes.decode)
+    return con
+
+
+def load_from_sqlite(events: bool = True):
+    """
+    the frames every build needs. with events=False game_events is None: the
+    sql engine groups the assists in sqlite and the game pages read their
+    season's events when they are built (see read_season_events).
+    """
+    con = open_db()
+    tables = read_game_rows(con, events=events)
+    opp_meta, player_bio = read_meta(con)
+    con.close()
+
+    # each table's raw rows are released as soon as its frame exists
+    game_events = prepare_events(rows_frame(*tables.pop("events"))) if events else None
+    df, gps = prepare_frames(rows_frame(*tables.pop("ir")), rows_frame(*tables.pop("gps")))
+    return df, opp_meta, player_bio, game_events, gps
+
 
-    assists["season"] = pd.to_numeric(assists["season"], errors="coerce").fillna(0).astype(int)
+def assist_counts(events: pd.DataFrame) -> pd.DataFrame:
+    """assists per (season, player, other_player), grouped from the loaded events"""
+    assists = events[events["event_kind"].astype(str) == "assist"]
+    season = pd.to_numeric(assists["season"], errors="coerce").fillna(0).astype(int)
+    return (
+        assists.assign(season=season)
+        .groupby(["season", "player", "other_player"])
+        .size()
+        .reset_index(name="AST")
+    )
 
+
+def build_assist_links(counts: pd.DataFrame, seasons: list[int]) -> None:
     def build_rows(d: pd.DataFrame):
         if d.empty:
             return []
         grouped = (
-            d.groupby(["player", "other_player"])
-            .size()
-            .reset_index(name="AST")
+            d.groupby(["player", "other_player"])["AST"]
+            .sum()
+            .reset_index()
             .sort_values(["AST", "player", "other_player"], ascending=[False, True, True])
         )
         grouped["ASSISTER"] = grouped["player"]
@@ -287,21 +724,28 @@ def build_assist_links(events: pd.DataFrame, seasons: list[int]) -> None:
         grouped["rowColor"] = grouped["ASSISTER"].map(lambda x: COLOR_MAP.get(x, "#A6C9EC"))
         return grouped[["ASSISTER", "SCORER", "AST", "rowColor"]].to_dict(orient="records")
 
-    write_json(DATA_DIR / "assists" / "assists_all.json", build_rows(assists))
+    write_json(DATA_DIR / "assists" / "assists_all.json", build_rows(counts))
     for s in seasons:
-        write_json(DATA_DIR / "assists" / f"assists_by_season_{s}.json", build_rows(assists[assists["season"] == int(s)]))
+        write_json(DATA_DIR / "assists" / f"assists_by_season_{s}.json", build_rows(counts[counts["season"] == int(s)]))
+
 
+def profile_rows(df: pd.DataFrame) -> pd.DataFrame:
+    return df[
+        (df["GAME"] > 0)
+        & ~(df["OPP"].astype(str).str.lower() == "injury reserves")
+        & ~(df["NAMES"].astype(str).str.lower() == "injury reserves")
+    ]
 
-def build_player_profiles(df: pd.DataFrame, bio: pd.DataFrame) -> None:
-    players_df = df[df["GAME"] > 0].copy()
-    players_df = players_df[
-        ~(players_df["OPP"].astype(str).str.lower() == "injury reserves")
-    ].copy()
-    players_df = players_df[
-        ~(players_df["NAMES"].astype(str).str.lower() == "injury reserves")
-    ].copy()
 
-    players_df["rowColor"] = players_df["NAMES"].map(lambda x: COLOR_MAP.get(x, "#A6C9EC"))
+def build_player_profiles(
+    df: pd.DataFrame,
+    cube: pd.DataFrame,
+    bio: pd.DataFrame,
+    names: set[str] | None = None,
+    write_index: bool = True,
+) -> None:
+    players_df = profile_rows(df)
+    players_df = players_df.assign(rowColor=players_df["NAMES"].map(lambda x: COLOR_MAP.get(x, "#A6C9EC")))
     players_df = add_percentages(players_df)
     players_fmt = format_fields(players_df, "game")
 
@@ -325,7 +769,8 @@ def build_player_profiles(df: pd.DataFrame, bio: pd.DataFrame) -> None:
             "rowColor": COLOR_MAP.get(name, "#A6C9EC"),
         })
 
-    write_json(DATA_DIR / "players" / "index.json", {"players": index})
+    if write_index:
+        write_json(DATA_DIR / "players" / "index.json", {"players": index})
 
     best_cols = [
         "SEASON", "GAME", "OPP", "TYPE",
@@ -333,13 +778,18 @@ def build_player_profiles(df: pd.DataFrame, bio: pd.DataFrame) -> None:
         "MIN", "PM", "FG%", "3P%", "FT%", "TS%",
     ]
 
-    averages_all = calc_averages(players_df)
-    totals_all = calc_totals(players_df)
-    highs_all = calc_highs(players_df)
+    cells = cube_slice(cube, ("player",))
+    averages_all = calc_averages(cells)
+    totals_all = calc_totals(cells)
+    highs_all = calc_highs(cells)
 
     for name in players:
+        # incremental builds only rewrite the players who appeared in a changed game
+        if names is not None and name not in names:
+            continue
+
         b = bio_map.get(name, {})
-        player_rows = players_fmt[players_fmt["NAMES"] == name].copy()
+        player_rows = players_fmt[players_fmt["NAMES"] == name]
         top_games = player_rows.sort_values("GSC", ascending=False).head(5)
         display_cols = [f"{c}_display" for c in best_cols if f"{c}_display" in top_games.columns]
         top_games = top_games[[c for c in best_cols if c in top_games.columns] + display_cols]
@@ -363,15 +813,327 @@ def build_player_profiles(df: pd.DataFrame, bio: pd.DataFrame) -> None:
         write_json(DATA_DIR / "players" / f"{slugify(name)}.json", profile)
 
 
-def main():
-    global opp_color_dict
-    df, opp_meta, player_bio, game_events = load_from_sqlite()
+def team_rows(d: pd.DataFrame) -> pd.DataFrame:
+    """one synthetic "Injury Reserves" row per game, built from the player rows"""
+    stat_cols = [
+        "2PM", "2PA", "3PM", "3PA", "FGM", "FGA", "FTM", "FTA",
+        "O REB", "D REB", "PTS", "REB", "AST", "BLK", "STL",
+        "TOV", "FLS", "GSC", "MIN", "PM",
+    ]
 
-    if df.empty:
-        raise SystemExit("no rows in InjuryReserves")
+    rows = []
 
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    for (season, game), g in d.groupby(["SEASON", "GAME"]):
+
+        # only real player rows
+        players = g[
+            (~g["NAMES"].astype(str).str.contains("Injury Reserves", case=False, na=False))
+        ]
+
+        if players.empty:
+            continue
+
+        opp_name = players["OPP"].mode()[0]
+
+        row = {
+            "SEASON": season,
+            "GAME": game,
+            "NAMES": "Injury Reserves",
+            "OPP": opp_name,
+        }
+
+        for c in stat_cols:
+            if c not in players.columns:
+                continue
+            if c == "GSC":
+                row[c] = players[c].mean()
+            else:
+                row[c] = players[c].sum()
+
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+# ---- aggregation cube ----
+
+# every aggregate table is a roll-up of these cells. ROLE is "player", "team"
+# (rebuilt per-game totals) or "stored" (team rows saved in InjuryReserves);
+# COUNTED is GAME > 0.
+CUBE_KEYS = ["ROLE", "NAMES", "SEASON", "OPP", "TYPE", "COUNTED"]
+TRACKED_COLS = ["MIN", "PM"]
 
+
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    one pass over the loaded rows: per cell, the sum, count and max of every
+    stat, the min GSC, the row count, and how many rows tracked MIN / PM.
+    each cell also keeps its rows' GSC values and load positions (see gsc_means).
+    """
+    # the stored ROLE (see migrate_db.py) is replaced by the cube's own roles
+    is_mirror = df["ROLE"] == "opponent"
+    is_team = df["ROLE"] == "team"
+
+    rows = df[~is_mirror].assign(ROLE=np.where(is_team[~is_mirror], "stored", "player"))
+    team = team_rows(rows[(rows["ROLE"] == "player") & (rows["GAME"] > 0)])
+    if not team.empty:
+        rows = pd.concat([rows, team.assign(ROLE="team")], ignore_index=True)
+
+    rows["TYPE"] = rows["TYPE"].astype(str).str.strip().str.upper()
+    rows["COUNTED"] = rows["GAME"] > 0
+
+    stats = [c for c in COLUMNS_SUM if c in rows.columns]
+    for c in TRACKED_COLS:
+        rows[f"{c}:nz"] = rows[c].notna() & (rows[c] != 0)
+
+    g = rows.groupby(CUBE_KEYS, sort=False, dropna=False)
+    cells = pd.concat([
+        g[stats].sum().add_suffix(":sum"),
+        g[stats].count().add_suffix(":cnt"),
+        g[stats].max().add_suffix(":max"),
+        g[["GSC"]].min().add_suffix(":min"),
+        g[[f"{c}:nz" for c in TRACKED_COLS]].sum(),
+        g.size().rename("n"),
+    ], axis=1)
+
+    # with sort=False the group numbers follow the cells' order
+    cell = g.ngroup().to_numpy()
+    order = np.argsort(cell, kind="stable")
+    bounds = np.cumsum(np.bincount(cell, minlength=len(cells)))[:-1]
+    cells["GSC:ord"] = np.split(order, bounds)
+    cells["GSC:rows"] = np.split(rows["GSC"].to_numpy(dtype=np.float64)[order], bounds)
+    return cells.reset_index()
+
+
+def cube_slice(cube: pd.DataFrame, roles: tuple, season=None, opp=None, gtype=None, counted: bool = True) -> pd.DataFrame:
+    mask = cube["ROLE"].isin(roles)
+    if counted:
+        mask &= cube["COUNTED"]
+    if season is not None:
+        mask &= cube["SEASON"] == season
+    if opp is not None:
+        mask &= cube["OPP"] == opp
+    if gtype is not None:
+        mask &= cube["TYPE"] == gtype
+    return cube[mask]
+
+
+# ---- aggregation engines ----
+
+# an engine turns the loaded frames into the tables every page is rolled up
+# from: the cube and the assist counts. "pandas" groups the frames in python,
+# "sql" pushes the same GROUP BYs down to sqlite and only reads back the
+# grouped rows. both produce identical frames (see compare_engines.py).
+
+# InjuryReserves columns behind the cube stats; MIN / PM come from game_player_stats
+SQL_STAT_COLS = {"O REB": "OREB", "D REB": "DREB"}
+
+
+def _ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class PandasSum:
+    """
+    sqlite window function for the float sums: the kahan summation
+    groupby().sum() does, over the rows in partition order. it only matches
+    pandas bit for bit over a whole partition (UNBOUNDED PRECEDING to
+    UNBOUNDED FOLLOWING); a sliding frame still gets a compensated sum, but
+    pandas never subtracts rows so the last bits can differ
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def step(self, x):
+        y = x - self.compensation
+        t = self.total + y
+        self.compensation = t - self.total - y
+        if self.compensation != self.compensation:
+            self.compensation = 0.0
+        self.total = t
+
+    def inverse(self, x):
+        # a row leaving the frame goes through the same compensated add
+        self.step(-x)
+
+    def value(self):
+        return self.total
+
+
+class PandasMean:
+    """
+    sqlite window function for Series.mean(): numpy's sum of the rows over
+    their count. keeps the frame's rows, so any frame gives the same result
+    as pandas over those rows; the cube only uses whole partitions
+    """
+
+    def __init__(self):
+        self.values = deque()
+
+    def step(self, x):
+        self.values.append(x)
+
+    def inverse(self, x):
+        # sqlite drops rows from the start of the frame, in order
+        self.values.popleft()
+
+    def value(self):
+        if not self.values:
+            return None
+        return float(np.array(self.values, dtype=np.float64).sum() / len(self.values))
+
+
+class PackedValues:
+    """sqlite aggregate: the group's values as one numpy array blob, for GSC:ord / GSC:rows"""
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.values = []
+
+    def step(self, x):
+        self.values.append(x)
+
+    def finalize(self):
+        return np.array(self.values, dtype=self.dtype).tobytes()
+
+
+def sql_cube_query() -> str:
+    ir_stats = [c for c in COLUMNS_SUM if c not in TRACKED_COLS]
+    stats = ir_stats + TRACKED_COLS
+    cols = ", ".join(_ident(c) for c in ["ord", "ROLE", "NAMES", "SEASON", "GAME", "OPP", "TYPE", *stats])
+    whole = "ORDER BY ord ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING"
+
+    # missing stats count as 0, like the fillna(0) in prepare_frames()
+    loaded = ",\n".join(
+        f"coalesce(ir.{_ident(SQL_STAT_COLS.get(c, c))}, 0)" for c in ir_stats
+    )
+    team = ",\n".join(
+        "max(p.team_gsc)" if c == "GSC" else f"sum(p.{_ident(c)})" for c in stats
+    )
+    cells = ",\n".join(
+        ['max(gsc_sum) AS "GSC:sum"' if c == "GSC" else f"sum({_ident(c)}) AS {_ident(c + ':sum')}" for c in COLUMNS_SUM]
+        + [f"count({_ident(c)}) AS {_ident(c + ':cnt')}" for c in COLUMNS_SUM]
+        + [f"max({_ident(c)}) AS {_ident(c + ':max')}" for c in COLUMNS_SUM]
+        + ['min("GSC") AS "GSC:min"']
+        + ['pack_int64(ord - 1) AS "GSC:ord"', 'pack_float64("GSC") AS "GSC:rows"']
+        + [f"sum({_ident(c)} != 0) AS {_ident(c + ':nz')}" for c in TRACKED_COLS]
+        + ["count(*) AS n"]
+    )
+
+    # rows mirrors build_cube(): the merged df without the opponent rows, in
+    # load order. team mirrors team_rows(): one row per game from the player
+    # rows, OPP is the most common opponent (ties go to the smallest name).
+    # the GSC sums and means go through PandasSum / PandasMean in row order,
+    # so the floats match the pandas engine to the last bit; every other
+    # stat is integral and exact either way.
+    return f"""
+        WITH rows({cols}) AS (
+            SELECT row_number() OVER (ORDER BY ir.rowid, g.rowid),
+                   CASE WHEN ir.ROLE = 'team' THEN 'stored' ELSE 'player' END,
+                   ir.NAMES, ir.SEASON, ir.GAME, ir.OPP, upper(trim(ir.TYPE)),
+                   {loaded},
+                   coalesce(g.minutes, 0), coalesce(g.plus_minus, 0)
+            FROM InjuryReserves ir
+            LEFT JOIN game_player_stats g
+                ON g.season IS ir.SEASON AND g.game IS ir.GAME AND g.player IS ir.NAMES
+            WHERE ir.ROLE IS NOT 'opponent'
+        ),
+        players AS (
+            SELECT *, pandas_mean("GSC") OVER (PARTITION BY SEASON, GAME {whole}) AS team_gsc
+            FROM rows
+            WHERE ROLE = 'player' AND GAME > 0 AND SEASON IS NOT NULL
+              AND (NAMES IS NULL OR instr(lower(NAMES), 'injury reserves') = 0)
+        ),
+        team_opp AS (
+            SELECT SEASON, GAME, OPP,
+                   row_number() OVER (PARTITION BY SEASON, GAME ORDER BY count(*) DESC, OPP) AS pick
+            FROM players
+            WHERE OPP IS NOT NULL
+            GROUP BY SEASON, GAME, OPP
+        ),
+        team({cols}) AS (
+            SELECT (SELECT max(ord) FROM rows) + row_number() OVER (ORDER BY p.SEASON, p.GAME),
+                   'team', 'Injury Reserves', p.SEASON, p.GAME, o.OPP, NULL,
+                   {team}
+            FROM players p
+            LEFT JOIN team_opp o ON o.SEASON = p.SEASON AND o.GAME = p.GAME AND o.pick = 1
+            GROUP BY p.SEASON, p.GAME
+        ),
+        cube_rows AS (
+            SELECT *, coalesce(GAME > 0, 0) AS COUNTED
+            FROM (SELECT * FROM rows UNION ALL SELECT * FROM team)
+        )
+        SELECT ROLE, NAMES, SEASON, OPP, TYPE, COUNTED,
+               {cells}
+        FROM (
+            SELECT *, pandas_sum("GSC") OVER (PARTITION BY {", ".join(CUBE_KEYS)} {whole}) AS gsc_sum
+            FROM cube_rows
+        )
+        GROUP BY {", ".join(CUBE_KEYS)}
+        ORDER BY min(ord)
+    """
+
+
+SQL_ASSIST_QUERY = """
+    SELECT coalesce(CAST(season AS INTEGER), 0) AS season, player, other_player, count(*) AS AST
+    FROM game_events
+    WHERE event_kind = 'assist' AND player IS NOT NULL AND other_player IS NOT NULL
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+"""
+
+
+def sql_cube(con: sqlite3.Connection, df: pd.DataFrame) -> pd.DataFrame:
+    """build_cube() computed by sqlite; df only supplies the column dtypes"""
+    con.create_window_function("pandas_sum", 1, PandasSum)
+    con.create_window_function("pandas_mean", 1, PandasMean)
+    con.create_aggregate("pack_int64", 1, partial(PackedValues, np.int64))
+    con.create_aggregate("pack_float64", 1, partial(PackedValues, np.float64))
+    cube = rows_frame(*query_rows(con, sql_cube_query()))
+    for c, dtype in [("GSC:ord", np.int64), ("GSC:rows", np.float64)]:
+        cube[c] = [np.frombuffer(b, dtype=dtype) for b in cube[c]]
+
+    # give every column the dtype the pandas engine ends up with; its keys
+    # are plain strings again once the team rows are concatenated
+    dtypes = {c: "str" for c in ["ROLE", "NAMES", "OPP", "TYPE"]}
+    dtypes["SEASON"] = df["SEASON"].dtype
+    dtypes["COUNTED"] = bool
+    for c in COLUMNS_SUM:
+        dtypes.update({f"{c}:sum": df[c].dtype, f"{c}:cnt": "int64", f"{c}:max": df[c].dtype})
+    dtypes["GSC:min"] = df["GSC"].dtype
+    dtypes.update({f"{c}:nz": "int64" for c in TRACKED_COLS}, n="int64")
+    return cube.astype(dtypes)
+
+
+def sql_assist_counts(con: sqlite3.Connection) -> pd.DataFrame:
+    try:
+        counts = rows_frame(*query_rows(con, SQL_ASSIST_QUERY))
+    except sqlite3.Error:
+        counts = pd.DataFrame(columns=["season", "player", "other_player", "AST"])
+    return counts.astype({"season": "int64", "AST": "int64"})
+
+
+def pandas_aggregates(df: pd.DataFrame, game_events: pd.DataFrame, db_path: Path | None = None) -> dict:
+    return {"cube": build_cube(df), "assists": assist_counts(game_events)}
+
+
+def sql_aggregates(df: pd.DataFrame, game_events: pd.DataFrame, db_path: Path | None = None) -> dict:
+    con = open_db(db_path)
+    try:
+        return {"cube": sql_cube(con, df), "assists": sql_assist_counts(con)}
+    finally:
+        con.close()
+
+
+AGGREGATION_ENGINES = {
+    "pandas": pandas_aggregates,
+    "sql": sql_aggregates,
+}
+
+
+def build_index(df: pd.DataFrame, opp_meta: pd.DataFrame):
     seasons = sorted(df["SEASON"].dropna().unique().tolist(), reverse=True)
     season_games = {
         str(s): sorted(df[df["SEASON"] == s]["GAME"].dropna().unique().tolist(), reverse=True)
@@ -383,7 +1145,7 @@ def main():
         s_int = int(s)
 
         s_df = exclude_injury_opp(
-            df[(df["SEASON"] == s_int) & (df["GAME"] > 0)].copy()
+            df[(df["SEASON"] == s_int) & (df["GAME"] > 0)]
         )
 
         # Only season 4+ keeps MIN and PM
@@ -392,10 +1154,10 @@ def main():
 
         season_teams[str(s)] = sorted(s_df["OPP"].dropna().unique().tolist())
 
-        opp_color_dict = {
-            row["opp"]: row["color"]
-            for _, row in opp_meta.iterrows()
-        }
+    opp_color_dict = {
+        row["opp"]: row["color"]
+        for _, row in opp_meta.iterrows()
+    }
 
     index = {
         "seasons": [str(s) for s in seasons],
@@ -407,311 +1169,714 @@ def main():
     }
     write_json(DATA_DIR / "index.json", index)
 
-    base = df[df["GAME"] > 0].copy()
+    return seasons, season_games, season_teams, opp_color_dict
 
-    # remove mirror opponent rows
-    base = base[
-        ~(base["OPP"].astype(str).str.lower() == "injury reserves")
-    ].copy()
 
-    # remove existing fake Injury Reserves rows
-    base = base[
-        ~(base["NAMES"].astype(str).str.lower() == "injury reserves")
-    ].copy()
+def build_all_time_aggregates(cube: pd.DataFrame) -> None:
+    cells = cube_slice(cube, ("player", "team")).copy()
 
-    def build_team_rows(d):
-        stat_cols = [
-            "2PM", "2PA", "3PM", "3PA", "FGM", "FGA", "FTM", "FTA",
-            "O REB", "D REB", "PTS", "REB", "AST", "BLK", "STL",
-            "TOV", "FLS", "GSC", "MIN", "PM",
-        ]
+    # Only keep real MIN / PM from season 4+
+    early = cells["SEASON"] < 4
+    for c in TRACKED_COLS:
+        cells.loc[early, [f"{c}:sum", f"{c}:max", f"{c}:nz"]] = 0
 
-        team_rows = []
+    averages_all = filter_min_games(calc_averages(cells), 3)
+    totals_all = filter_min_games(calc_totals(cells), 3)
+    highs_all = filter_min_games(calc_highs(cells), 3)
 
-        for (season, game), g in d.groupby(["SEASON", "GAME"]):
+    write_json(DATA_DIR / "aggregates" / "averages_all.json", averages_all.to_dict(orient="records"))
+    write_json(DATA_DIR / "aggregates" / "totals_all.json", totals_all.to_dict(orient="records"))
+    write_json(DATA_DIR / "aggregates" / "highs_all.json", highs_all.to_dict(orient="records"))
 
-            # only real player rows
-            players = g[
-                (~g["NAMES"].astype(str).str.contains("Injury Reserves", case=False, na=False))
-            ].copy()
 
-            if players.empty:
-                continue
+def build_season_aggregates(cube: pd.DataFrame, s) -> None:
+    cells = cube_slice(cube, ("player", "team"), season=s)
 
-            opp_name = players["OPP"].mode()[0]
+    stats = COLUMNS_SUM
+    if int(s) < 4:
+        stats = [c for c in COLUMNS_SUM if c not in TRACKED_COLS]
 
-            row = {
-                "SEASON": season,
-                "GAME": game,
-                "NAMES": "Injury Reserves",
-                "OPP": opp_name,
-            }
+    write_json(DATA_DIR / "aggregates" / f"averages_by_season_{s}.json", calc_averages(cells, stats).to_dict(orient="records"))
+    write_json(DATA_DIR / "aggregates" / f"totals_by_season_{s}.json", calc_totals(cells, stats).to_dict(orient="records"))
+    write_json(
+        DATA_DIR / "aggregates" / f"highs_by_season_{s}.json",
+        calc_highs(cells, stats).drop(columns=["GP"], errors="ignore").to_dict(orient="records"),
+    )
 
-            for c in stat_cols:
-                if c not in players.columns:
-                    continue
-                if c == "GSC":
-                    row[c] = players[c].mean()
-                else:
-                    row[c] = players[c].sum()
 
-            team_rows.append(row)
+def build_vs_files(cube: pd.DataFrame, s, opps: list[str]) -> None:
+    for opp in opps:
+        cells = cube_slice(cube, ("player", "team"), season=s, opp=opp)
+        if cells.empty:
+            continue
+        avg = calc_averages(cells)
+        write_json(DATA_DIR / "vs" / f"vs_{s}_{slugify(opp)}.json", {
+            "season": int(s),
+            "opponent": opp,
+            "rows": avg.to_dict(orient="records")
+        })
 
-        if team_rows:
-            return pd.concat([d, pd.DataFrame(team_rows)], ignore_index=True)
 
-        return d
+def event_play_text(row: dict, opp: str, opp_color_dict: dict) -> dict:
+    kind = str(row.get("event_kind", "") or "")
+    player = str(row.get("player", "") or "")
+    other = str(row.get("other_player", "") or "")
+    code = str(row.get("code", "") or "")
+    points = int(row.get("points", 0) or 0)
+    if kind == "assist":
+        return {"PLAYER": player, "PLAY": f"assist to {other}", "rowColor": COLOR_MAP.get(player, "#A6C9EC")}
+    if kind == "opp":
+        label = "free throw" if points == 1 else "field goal" if points == 2 else "three ball"
+        return {"PLAYER": opp.lower(), "PLAY": label, "rowColor": opp_color_dict.get(opp, DEFAULT_OPP_COLOR)}
+    if kind == "sub":
+        if code == "IN FOR" and other:
+            return {"PLAYER": player, "PLAY": f"in for {other}", "rowColor": COLOR_MAP.get(player, "#A6C9EC")}
+        return {"PLAYER": player, "PLAY": str(code or "sub").lower(), "rowColor": COLOR_MAP.get(player, "#A6C9EC")}
+    event_labels = {
+        "2PM": "made 2",
+        "2PA": "missed 2",
+        "3PM": "made 3",
+        "3PA": "missed 3",
+        "FTM": "made ft",
+        "FTA": "missed ft",
+        "OREB": "offensive rebound",
+        "DREB": "defensive rebound",
+        "STL": "steal",
+        "BLK": "block",
+        "TOV": "turnover",
+        "FLS": "foul",
+    }
+    return {"PLAYER": player, "PLAY": event_labels.get(code, code.lower()), "rowColor": COLOR_MAP.get(player, "#A6C9EC")}
 
-    base = build_team_rows(base)
 
-    # Only keep real MIN / PM from season 4+
-    if "MIN" in base.columns:
-        base.loc[base["SEASON"] < 4, "MIN"] = 0
+def game_player_rows(g_df: pd.DataFrame, has_minutes: bool) -> pd.DataFrame:
+    # real player rows:
+    players = g_df[g_df["ROLE"] == "player"].drop(columns=["ROLE"])
 
-    if "PM" in base.columns:
-        base.loc[base["SEASON"] < 4, "PM"] = 0
+    if not has_minutes:
+        players = players.drop(columns=["MIN", "PM"], errors="ignore")
 
-    # drop columns entirely if no valid values exist
-    if base["MIN"].dropna().empty:
-        base = base.drop(columns=["MIN"], errors="ignore")
+    return players
 
-    if base["PM"].dropna().empty:
-        base = base.drop(columns=["PM"], errors="ignore")
 
-    averages_all = filter_min_games(calc_averages(base), 3)
-    totals_all = filter_min_games(calc_totals(base), 3)
-    highs_all = filter_min_games(calc_highs(base), 3)
+def build_game_payload(g_df: pd.DataFrame, ev_df: pd.DataFrame | None, s, gnum, has_minutes: bool, opp_color_dict: dict) -> dict:
+    # identify opponent safely
+    opp = str(g_df["OPP"].iloc[0]).strip()
 
-    write_json(DATA_DIR / "aggregates" / "averages_all.json", averages_all.to_dict(orient="records"))
-    write_json(DATA_DIR / "aggregates" / "totals_all.json", totals_all.to_dict(orient="records"))
-    write_json(DATA_DIR / "aggregates" / "highs_all.json", highs_all.to_dict(orient="records"))
+    players = game_player_rows(g_df, has_minutes)
 
-    opp_names_all = set(df["OPP"].dropna().unique().tolist())
+    # --- build a synthetic "injury reserves" totals row from players ---
+    stat_cols = [
+        "2PM", "2PA", "3PM", "3PA", "FGM", "FGA", "FTM", "FTA", "O REB", "D REB",
+        "PTS", "REB", "AST", "BLK", "STL", "TOV", "FLS", "GSC",
+    ]
 
-    for s in seasons:
-        s_df = df[(df["SEASON"] == s) & (df["GAME"] > 0)].copy()
+    tot = {}
+    for c in stat_cols:
+        if c not in players.columns:
+            continue
+        if c == "GSC":
+            tot[c] = float(players[c].mean())
+        else:
+            tot[c] = float(players[c].sum())
 
-        # remove mirror rows
-        s_df = s_df[
-            ~(s_df["OPP"].astype(str).str.lower() == "injury reserves")
-        ].copy()
+    tot["NAMES"] = "Injury Reserves"
 
-        # remove stored fake team rows
-        s_df = s_df[
-            ~(s_df["NAMES"].astype(str).str.lower() == "injury reserves")
-        ].copy()
+    if "MIN" in players.columns:
+        tot["MIN"] = float(players["MIN"].max())
 
-        # rebuild real team rows
-        s_df = build_team_rows(s_df)
+    if "PM" in players.columns:
+        team_score = players["PTS"].sum()
 
-        if int(s) < 4:
-            s_df = s_df.drop(columns=["MIN", "PM"], errors="ignore")
+        opp_score = g_df[g_df["ROLE"] == "opponent"]["PTS"].sum()
 
-        write_json(DATA_DIR / "aggregates" / f"averages_by_season_{s}.json", calc_averages(s_df).to_dict(orient="records"))
-        write_json(DATA_DIR / "aggregates" / f"totals_by_season_{s}.json", calc_totals(s_df).to_dict(orient="records"))
-        write_json(
-            DATA_DIR / "aggregates" / f"highs_by_season_{s}.json",
-            calc_highs(s_df).drop(columns=["GP"], errors="ignore").to_dict(orient="records"),
-        )
+        tot["PM"] = float(team_score - opp_score)
 
-        s_all = df[df["SEASON"] == s].copy()
+    totals_row = pd.DataFrame([tot])
 
-        # remove mirror opponent rows
-        s_all = s_all[
-            ~(s_all["OPP"].astype(str).str.lower() == "injury reserves")
-        ].copy()
+    # combine: players + totals row
+    players = pd.concat([players, totals_row], ignore_index=True)
 
-        # remove stored fake team rows
-        s_all = s_all[
-            ~(s_all["NAMES"].astype(str).str.lower() == "injury reserves")
-        ].copy()
+    # drop non-display cols, then format
+    players = players.drop(columns=["OPP", "SEASON", "GAME", "TYPE"], errors="ignore")
+    players = add_percentages(players)
+    players["rowColor"] = players["NAMES"].map(lambda x: COLOR_MAP.get(x, "#A6C9EC"))
+    players = format_fields(players, "game")
 
-        # rebuild real team rows
-        s_all = build_team_rows(s_all)
+    # team score row: ROLE team and OPP == opp
+    team_score = g_df[(g_df["ROLE"] == "team") & (g_df["OPP"].astype(str) == opp)]["PTS"].sum()
 
-        for opp in season_teams[str(s)]:
-            t_df = s_all[(s_all["OPP"] == opp) & (s_all["GAME"] > 0)].copy()
-            if t_df.empty:
-                continue
-            avg = calc_averages(t_df)
-            write_json(DATA_DIR / "vs" / f"vs_{s}_{slugify(opp)}.json", {
-                "season": int(s),
-                "opponent": opp,
-                "rows": avg.to_dict(orient="records")
-            })
+    # opponent score row (your requirement): ROLE opponent and NAMES == opp
+    opp_score = g_df[(g_df["ROLE"] == "opponent") & (g_df["NAMES"].astype(str) == opp)]["PTS"].sum()
 
-        for gnum in season_games[str(s)]:
-            g_df = df[(df["SEASON"] == s) & (df["GAME"] == gnum)].copy()
-            # ---- load minutes and plus-minus from game_player_stats ----
-            con = sqlite3.connect(DB_PATH)
-            gps = pd.read_sql_query(
-                """
-                SELECT player, minutes, plus_minus
-                FROM game_player_stats
-                WHERE season = ?
-                  AND game = ?
-                """,
-                con,
-                params=(s, gnum)
-            )
-            con.close()
+    payload = {
+        "season": int(s),
+        "game": int(gnum),
+        "opponent": opp,
+        "opponentColor": opp_color_dict.get(opp, DEFAULT_OPP_COLOR),
+        "teamScore": float(team_score),
+        "opponentScore": float(opp_score),
+        "players": players.to_dict(orient="records"),
+        "playByPlay": [],
+    }
 
-            gps = gps.rename(columns={
-                "player": "NAMES",
-                "minutes": "MIN",
-                "plus_minus": "PM",
+    if ev_df is not None and not ev_df.empty:
+        play_rows = []
+        for row in ev_df.iloc[::-1].to_dict(orient="records"):
+            event_row = event_play_text(row, opp, opp_color_dict)
+            play_rows.append({
+                "PERIOD": str(row.get("period", "") or ""),
+                "CLOCK": str(row.get("clock", "") or ""),
+                **event_row,
             })
+        payload["playByPlay"] = play_rows
+
+    return payload
 
-            if g_df.empty:
+
+def build_game_files(
+    df: pd.DataFrame,
+    game_events: pd.DataFrame,
+    gps: pd.DataFrame,
+    opp_color_dict: dict,
+    only: set | None = None,
+) -> None:
+    # games with any game_player_stats rows keep their MIN / PM columns
+    tracked = set(zip(gps["SEASON"].astype(int), gps["GAME"].astype(int)))
+
+    ev_season = pd.to_numeric(game_events["season"], errors="coerce").fillna(-1).astype(int)
+    ev_game = pd.to_numeric(game_events["game"], errors="coerce").fillna(-1).astype(int)
+    events_by_game = dict(tuple(game_events.groupby([ev_season, ev_game], sort=False)))
+
+    for (s, gnum), g_df in df.groupby(["SEASON", "GAME"], sort=False):
+        key = (int(s), int(gnum))
+        if only is not None and key not in only:
+            continue
+
+        payload = build_game_payload(g_df, events_by_game.get(key), s, gnum, key in tracked, opp_color_dict)
+        write_json(DATA_DIR / "games" / f"{s}_{int(gnum)}.json", payload)
+
+
+def build_highs_links(df: pd.DataFrame, gps: pd.DataFrame, s=None) -> None:
+    """
+    the game each career high (and lowest GSC) came from, for the links on the
+    highs page. uses the same player rows as the game files; ties go to the
+    latest game. writes highs_links_all.json, or the season file when s is set.
+    """
+    tracked = pd.MultiIndex.from_arrays([gps["SEASON"].astype(int), gps["GAME"].astype(int)])
+
+    # the game files' player rows (see game_player_rows) in one filter instead
+    # of a frame per game: untracked games have no MIN / PM
+    rows = df[df["ROLE"] == "player"].drop(columns=["ROLE"])
+    has_minutes = pd.MultiIndex.from_arrays([rows["SEASON"].astype(int), rows["GAME"].astype(int)]).isin(tracked)
+    for c in TRACKED_COLS:
+        if c in rows.columns:
+            rows[c] = rows[c].where(has_minutes)
+    rows = rows[rows["NAMES"].notna() & (rows["NAMES"].astype(str) != "")]
+    rows = rows.sort_values(["SEASON", "GAME"], ascending=False, kind="stable")
+
+    links = {}
+    stats = [(c, c, False) for c in COLUMNS_SUM if c in rows.columns] + [("Lowest GSC", "GSC", True)]
+    for key, source, lowest in stats:
+        vals = rows[["NAMES", "SEASON", "GAME", source]].dropna(subset=[source])
+        best = vals.sort_values(source, ascending=lowest, kind="stable").drop_duplicates("NAMES")
+        for name, season, gnum in zip(best["NAMES"], best["SEASON"], best["GAME"]):
+            links.setdefault(str(name), {})[key] = {"season": int(season), "game": int(gnum)}
+
+    name = "highs_links_all.json" if s is None else f"highs_links_by_season_{s}.json"
+    write_json(DATA_DIR / "aggregates" / name, dict(sorted(links.items())))
+
+
+def build_by_type(cube: pd.DataFrame, types: list[str]) -> None:
+    for t in types:
+        cells = cube_slice(cube, ("player", "stored"), gtype=t, counted=False)
+        if cells.empty:
+            continue
+        write_json(DATA_DIR / "aggregates" / f"by_type_{t}.json", calc_averages(cells).to_dict(orient="records"))
+
+
+# ---- incremental builds ----
+
+def _digest(hashes: pd.Series) -> str:
+    return hashlib.sha1(hashes.to_numpy().tobytes()).hexdigest()
+
+
+def meta_fingerprint(opp_meta: pd.DataFrame, player_bio: pd.DataFrame) -> str:
+    # anything that touches every output forces a full rebuild when it changes
+    h = hashlib.sha1()
+    h.update(_digest(pd.util.hash_pandas_object(opp_meta, index=False)).encode())
+    h.update(_digest(pd.util.hash_pandas_object(player_bio, index=False)).encode())
+    h.update(json.dumps([COLOR_MAP, DEFAULT_OPP_COLOR, BUILD_STATE_VERSION]).encode())
+    return h.hexdigest()
+
+
+def game_fingerprints(df: pd.DataFrame, game_events: pd.DataFrame | None, db_path: Path | None = None) -> dict:
+    """
+    one entry per (season, game) with a hash of its rows and events, plus the
+    opponents, game types and players the game feeds into. without loaded
+    game_events, the events are hashed straight from db_path; that hash is
+    not the frame hash, so switching between the two rebuilds every game
+    with events once.
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=False)
+    keys = df["SEASON"].astype(int).astype(str) + "_" + df["GAME"].astype(int).astype(str)
+
+    if game_events is None:
+        ev_digests = event_digests(db_path)
+    else:
+        ev_season = pd.to_numeric(game_events["season"], errors="coerce").fillna(-1).astype(int)
+        ev_game = pd.to_numeric(game_events["game"], errors="coerce").fillna(-1).astype(int)
+        ev_hashes = pd.util.hash_pandas_object(game_events, index=False)
+        ev_digests = {
+            k: _digest(h)
+            for k, h in ev_hashes.groupby(ev_season.astype(str) + "_" + ev_game.astype(str), sort=False)
+        }
+
+    out = {}
+    for key, g in df.groupby(keys, sort=False):
+        is_mirror = g["OPP"].astype(str).str.lower() == "injury reserves"
+        is_team = g["NAMES"].astype(str).str.lower() == "injury reserves"
+        real = g[~is_mirror & ~is_team]
+
+        h = hashlib.sha1()
+        h.update(_digest(row_hashes[g.index]).encode())
+        h.update(ev_digests.get(key, "").encode())
+
+        out[key] = {
+            "hash": h.hexdigest(),
+            "season": int(g["SEASON"].iloc[0]),
+            "game": int(g["GAME"].iloc[0]),
+            "opps": sorted(g.loc[~is_mirror, "OPP"].dropna().astype(str).unique().tolist()),
+            "types": sorted(g["TYPE"].astype(str).str.strip().str.upper().unique().tolist()),
+            "players": sorted(real["NAMES"].dropna().astype(str).unique().tolist()),
+        }
+
+    return out
+
+
+# the rows behind every output, in the order the build reads them. rowids
+# only order the rows, so re-saving identical rows keeps the fingerprint
+SOURCE_QUERIES = [
+    "SELECT * FROM InjuryReserves ORDER BY rowid",
+    "SELECT season, game, player, minutes, plus_minus FROM game_player_stats ORDER BY rowid",
+    """
+    SELECT season, game, type, opp, period, clock, event_kind, player, other_player, code, points, id
+    FROM game_events ORDER BY id
+    """,
+    "SELECT opp, color FROM OpponentMeta ORDER BY rowid",
+    "SELECT name, height, position FROM player_bio ORDER BY rowid",
+]
+
+
+def source_fingerprint(con: sqlite3.Connection) -> str:
+    """
+    a rolling sha1 over every source row, the build constants and the output
+    mode. sqlite and hashlib only, so it is cheap to check before a build.
+    """
+    h = hashlib.sha1()
+    h.update(json.dumps([COLOR_MAP, DEFAULT_OPP_COLOR, BUILD_STATE_VERSION, output_mode()]).encode())
+    for sql in SOURCE_QUERIES:
+        try:
+            cur = con.execute(sql)
+        except sqlite3.Error:
+            h.update(b"missing")
+            continue
+        while rows := cur.fetchmany(10_000):
+            h.update(repr(rows).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def source_unchanged(source: str) -> bool:
+    """True when the last completed build read exactly these rows and left data/ in place"""
+    try:
+        prev = json.loads(SOURCE_STATE_PATH.read_text())
+    except (OSError, ValueError):
+        return False
+    return prev.get("source") == source and MANIFEST_PATH.exists() and BUILD_STATE_PATH.exists()
+
+
+def write_source_state(source: str | None) -> None:
+    # a build without a fingerprint (or one that fails halfway) leaves no
+    # state behind, so the next --incremental run does the full check
+    if source is None:
+        SOURCE_STATE_PATH.unlink(missing_ok=True)
+        return
+    write_if_changed(SOURCE_STATE_PATH, json.dumps({"source": source}, indent=2).encode("utf-8"))
+
+
+def load_build_state() -> dict | None:
+    try:
+        return json.loads(BUILD_STATE_PATH.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def game_outputs(games: dict) -> set[str]:
+    """the manifest keys that the given game fingerprints feed into"""
+    out = set()
+    for info in games.values():
+        s = info["season"]
+        out.add(f"data/games/{s}_{info['game']}.json")
+        out.update(f"data/vs/vs_{s}_{slugify(opp)}.json" for opp in info["opps"])
+        out.update(f"data/aggregates/{kind}_by_season_{s}.json" for kind in ("averages", "totals", "highs", "highs_links"))
+        out.add(f"data/assists/assists_by_season_{s}.json")
+        out.update(f"data/aggregates/by_type_{t}.json" for t in info["types"])
+        out.update(f"data/players/{slugify(name)}.json" for name in info["players"])
+    return out
+
+
+def plan_incremental(prev: dict | None, meta_hash: str, games: dict, output: str = "pretty") -> dict | None:
+    """
+    returns the outputs touched by games that changed since the last build,
+    or None when a full rebuild is needed.
+    """
+    if not prev or prev.get("version") != BUILD_STATE_VERSION or prev.get("meta") != meta_hash:
+        return None
+
+    # switching --compact / --columnar on or off rewrites every file
+    if prev.get("output", "pretty") != output:
+        return None
+
+    prev_games = prev.get("games", {})
+    changed = [k for k, v in games.items() if prev_games.get(k, {}).get("hash") != v["hash"]]
+    changed += [k for k in prev_games if k not in games]
+
+    plan = {
+        "games": set(),
+        "seasons": set(),
+        "vs": set(),
+        "types": set(),
+        "players": set(),
+        # outputs of games, opponents, seasons or players that no longer exist
+        "stale": game_outputs(prev_games) - game_outputs(games) if changed else set(),
+    }
+
+    for key in changed:
+        # a game that moved opponent or type still has to refresh the old splits
+        for info in (prev_games.get(key), games.get(key)):
+            if not info:
                 continue
+            s = info["season"]
+            plan["seasons"].add(s)
+            plan["vs"].update((s, opp) for opp in info["opps"])
+            plan["types"].update(info["types"])
+            plan["players"].update(info["players"])
+        if key in games:
+            plan["games"].add((games[key]["season"], games[key]["game"]))
+
+    return plan
+
+
+# ---- build executor ----
+
+# input frames for the current build; set once per worker process
+_FRAMES: dict = {}
+
+
+def _init_worker(frames: dict, output: dict | None = None) -> None:
+    _FRAMES.clear()
+    _FRAMES.update(frames)
+    set_output(**(output or {}))
+
+
+def run_unit(unit: tuple) -> tuple[dict, set]:
+    kind, *args = unit
+    f = _FRAMES
+    reset_written()
+
+    if kind == "all_time":
+        build_all_time_aggregates(f["cube"])
+        build_highs_links(f["df"], f["gps"])
+    elif kind == "season":
+        s, = args
+        build_season_aggregates(f["cube"], s)
+        build_highs_links(f["df"][f["df"]["SEASON"] == s], f["gps"], s)
+    elif kind == "vs":
+        build_vs_files(f["cube"], *args)
+    elif kind == "games":
+        s, only = args
+        events = f["game_events"] if f["game_events"] is not None else read_season_events(f["db_path"], s)
+        build_game_files(f["df"][f["df"]["SEASON"] == s], events, f["gps"], f["opp_color_dict"], only)
+    elif kind == "by_type":
+        build_by_type(f["cube"], *args)
+    elif kind == "players":
+        build_player_profiles(f["df"], f["cube"], f["player_bio"], *args)
+    elif kind == "assists":
+        build_assist_links(f["assists"], *args)
+    else:
+        raise ValueError(f"unknown build unit: {kind}")
+
+    return reset_written()
+
+
+def run_units(units: list[tuple], frames: dict, jobs: int = 1, output: dict | None = None) -> tuple[dict, set]:
+    """
+    runs independent build units serially, or over a process pool when jobs > 1.
+    every unit writes its own files, so the output is the same either way.
+    returns the manifest entries of every file written and the paths that changed.
+    """
+    if jobs <= 1 or len(units) <= 1:
+        _init_worker(frames, output)
+        results = [run_unit(unit) for unit in units]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(frames, output)) as pool:
+            results = list(pool.map(run_unit, units))
+
+    written, changed = {}, set()
+    for w, c in results:
+        written.update(w)
+        changed |= c
+    return written, changed
+
+
+def plan_units(
+    df: pd.DataFrame,
+    seasons: list,
+    season_games: dict,
+    season_teams: dict,
+    plan: dict | None,
+    jobs: int,
+) -> list[tuple]:
+    units = [("all_time",)]
 
-            # identify opponent safely
-            opp = str(g_df["OPP"].iloc[0]).strip()
+    for s in seasons:
+        if plan is not None and int(s) not in plan["seasons"]:
+            continue
 
-            # real player rows:
-            players = g_df[
-                (~g_df["NAMES"].astype(str).str.contains("Injury Reserves", case=False, na=False))
-                & (g_df["NAMES"].astype(str).str.strip() != opp)
-                ].copy()
+        units.append(("season", s))
 
-            has_minutes = not gps.empty
+        opps = season_teams[str(s)]
+        if plan is not None:
+            opps = [opp for opp in opps if (int(s), opp) in plan["vs"]]
+        if opps:
+            units.append(("vs", s, opps))
 
-            if not has_minutes:
-                players = players.drop(columns=["MIN", "PM"], errors="ignore")
+    for s in seasons:
+        only = {(int(s), int(g)) for g in season_games[str(s)]}
+        if plan is not None:
+            only &= plan["games"]
+        if only:
+            units.append(("games", s, only))
+
+    types = ["PRE", "REG", "FINAL"]
+    if plan is not None:
+        types = [t for t in types if t in plan["types"]]
+    units.extend(("by_type", [t]) for t in types)
+
+    # profiles share the career tables, so split them into one chunk per job
+    players = sorted(profile_rows(df)["NAMES"].dropna().unique().tolist())
+    if plan is not None:
+        players = [p for p in players if p in plan["players"]]
+    chunks = max(1, min(jobs, len(players)))
+    units.append(("players", set(players[0::chunks]), True))
+    for i in range(1, chunks):
+        units.append(("players", set(players[i::chunks]), False))
+
+    assist_seasons = seasons if plan is None else [s for s in seasons if int(s) in plan["seasons"]]
+    units.append(("assists", assist_seasons))
+
+    return units
+
+
+def run_build(
+    df: pd.DataFrame,
+    opp_meta: pd.DataFrame,
+    player_bio: pd.DataFrame,
+    game_events: pd.DataFrame,
+    gps: pd.DataFrame,
+    incremental: bool = False,
+    jobs: int = 1,
+    engine: str = "pandas",
+    db_path: Path | None = None,
+    source: str | None = None,
+) -> tuple[str, dict | None]:
+    """
+    builds data/ from loaded frames in the current output mode. returns the
+    summary line and the manifest entries (None when nothing needed a rebuild).
+    engine picks how the cube and assist counts are aggregated (see
+    AGGREGATION_ENGINES); "sql" re-reads them from db_path. with the sql
+    engine game_events can be None, and the game pages read their season's
+    events from db_path instead. source is the source_fingerprint() taken
+    before the frames were loaded.
+    """
+    output = output_mode()
+    if game_events is None and engine == "pandas":
+        raise ValueError("the pandas engine needs the loaded game_events")
 
-            # --- build a synthetic "injury reserves" totals row from players ---
-            stat_cols = [
-                "2PM", "2PA", "3PM", "3PA", "FGM", "FGA", "FTM", "FTA", "O REB", "D REB",
-                "PTS", "REB", "AST", "BLK", "STL", "TOV", "FLS", "GSC",
-            ]
+    if df.empty:
+        raise SystemExit("no rows in InjuryReserves")
 
-            for c in stat_cols:
-                if c in players.columns:
-                    players[c] = pd.to_numeric(players[c], errors="coerce").fillna(0)
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-            tot = {}
-            for c in stat_cols:
-                if c not in players.columns:
-                    continue
-                if c == "GSC":
-                    tot[c] = float(players[c].mean())
-                else:
-                    tot[c] = float(players[c].sum())
-
-            tot["NAMES"] = "Injury Reserves"
-
-            if "MIN" in players.columns:
-                tot["MIN"] = float(players["MIN"].max())
-
-            if "PM" in players.columns:
-                team_score = players["PTS"].sum()
-
-                opp_score = g_df[
-                    (g_df["OPP"].astype(str).str.lower() == "injury reserves")
-                ]["PTS"].sum()
-
-                tot["PM"] = float(team_score - opp_score)
-
-            totals_row = pd.DataFrame([tot])
-
-            # combine: players + totals row
-            players = pd.concat([players, totals_row], ignore_index=True)
-
-            # drop non-display cols, then format
-            players = players.drop(columns=["OPP", "SEASON", "GAME", "TYPE"], errors="ignore")
-            players = add_percentages(players)
-            players["rowColor"] = players["NAMES"].map(lambda x: COLOR_MAP.get(x, "#A6C9EC"))
-            players = format_fields(players, "game")
-
-            # team score row: NAMES contains 'Injury Reserves' and OPP == opp
-            team_score = g_df[
-                (g_df["OPP"].astype(str) == opp)
-                & (g_df["NAMES"].astype(str).str.contains("Injury Reserves", case=False, na=False))
-                ]["PTS"].sum()
-
-            # opponent score row (your requirement): OPP == 'Injury Reserves' and NAMES == opp
-            opp_score = g_df[
-                (g_df["OPP"].astype(str).str.lower() == "injury reserves")
-                & (g_df["NAMES"].astype(str) == opp)
-                ]["PTS"].sum()
-
-            players = players.drop(columns=["OPP", "SEASON", "GAME", "TYPE"], errors="ignore")
-            players = add_percentages(players)
-            players["rowColor"] = players["NAMES"].map(lambda x: COLOR_MAP.get(x, "#A6C9EC"))
-            players = format_fields(players, "game")
-
-            payload = {
-                "season": int(s),
-                "game": int(gnum),
-                "opponent": opp,
-                "opponentColor": opp_color_dict.get(opp, DEFAULT_OPP_COLOR),
-                "teamScore": float(team_score),
-                "opponentScore": float(opp_score),
-                "players": players.to_dict(orient="records"),
-                "playByPlay": [],
-            }
-
-            game_event_rows = game_events[
-                (pd.to_numeric(game_events["season"], errors="coerce").fillna(-1).astype(int) == int(s))
-                & (pd.to_numeric(game_events["game"], errors="coerce").fillna(-1).astype(int) == int(gnum))
-            ].copy()
-
-            if not game_event_rows.empty:
-                def event_play_text(row):
-                    kind = str(row.get("event_kind", "") or "")
-                    player = str(row.get("player", "") or "")
-                    other = str(row.get("other_player", "") or "")
-                    code = str(row.get("code", "") or "")
-                    points = int(row.get("points", 0) or 0)
-                    if kind == "assist":
-                        return {"PLAYER": player, "PLAY": f"assist to {other}", "rowColor": COLOR_MAP.get(player, "#A6C9EC")}
-                    if kind == "opp":
-                        label = "free throw" if points == 1 else "field goal" if points == 2 else "three ball"
-                        return {"PLAYER": opp.lower(), "PLAY": label, "rowColor": opp_color_dict.get(opp, DEFAULT_OPP_COLOR)}
-                    if kind == "sub":
-                        if code == "IN FOR" and other:
-                            return {"PLAYER": player, "PLAY": f"in for {other}", "rowColor": COLOR_MAP.get(player, "#A6C9EC")}
-                        return {"PLAYER": player, "PLAY": str(code or "sub").lower(), "rowColor": COLOR_MAP.get(player, "#A6C9EC")}
-                    event_labels = {
-                        "2PM": "made 2",
-                        "2PA": "missed 2",
-                        "3PM": "made 3",
-                        "3PA": "missed 3",
-                        "FTM": "made ft",
-                        "FTA": "missed ft",
-                        "OREB": "offensive rebound",
-                        "DREB": "defensive rebound",
-                        "STL": "steal",
-                        "BLK": "block",
-                        "TOV": "turnover",
-                        "FLS": "foul",
-                    }
-                    return {"PLAYER": player, "PLAY": event_labels.get(code, code.lower()), "rowColor": COLOR_MAP.get(player, "#A6C9EC")}
-
-                play_rows = []
-                for _, row in game_event_rows.iloc[::-1].iterrows():
-                    event_row = event_play_text(row)
-                    play_rows.append({
-                        "PERIOD": str(row.get("period", "") or ""),
-                        "CLOCK": str(row.get("clock", "") or ""),
-                        **event_row,
-                    })
-                payload["playByPlay"] = play_rows
-
-            write_json(DATA_DIR / "games" / f"{s}_{int(gnum)}.json", payload)
-
-    for t in ["PRE", "REG", "FINAL"]:
-        t_df = exclude_injury_opp(
-            df[df["TYPE"].astype(str).str.strip().str.upper() == t].copy()
+    meta_hash = meta_fingerprint(opp_meta, player_bio)
+    games = game_fingerprints(df, game_events, db_path)
+    plan = plan_incremental(load_build_state(), meta_hash, games, output) if incremental else None
+
+    if plan is not None and not plan["games"] and not plan["seasons"]:
+        write_source_state(source)
+        return "ok: data/ already up to date", None
+
+    write_source_state(None)
+    reset_written()
+    seasons, season_games, season_teams, opp_color_dict = build_index(df, opp_meta)
+    written, changed = reset_written()
+
+    frames = {
+        "df": df,
+        **AGGREGATION_ENGINES[engine](df, game_events, db_path),
+        "player_bio": player_bio,
+        "game_events": game_events,
+        "db_path": db_path,
+        "gps": gps,
+        "opp_color_dict": opp_color_dict,
+    }
+    units = plan_units(df, seasons, season_games, season_teams, plan, jobs)
+    unit_written, unit_changed = run_units(units, frames, jobs, dict(_OUTPUT))
+    written.update(unit_written)
+    changed |= unit_changed
+
+    # an incremental build only rewrites part of data/, so keep the other entries
+    # except the ones whose game or opponent is gone. a full build writes every
+    # output, so anything else in the old manifest is stale
+    if plan is None:
+        files = written
+        stale = load_manifest().keys() - written.keys()
+    else:
+        files = {**load_manifest(), **written}
+        stale = plan["stale"] - written.keys()
+    for key in stale:
+        files.pop(key, None)
+        (OUT_ROOT / key).unlink(missing_ok=True)
+        remove_compressed(OUT_ROOT / key)
+    write_manifest(files)
+
+    state = {"version": BUILD_STATE_VERSION, "meta": meta_hash, "output": output, "games": games}
+    write_if_changed(BUILD_STATE_PATH, json.dumps(state, ensure_ascii=False, indent=2).encode("utf-8"))
+    write_source_state(source)
+
+    if plan is None:
+        return f"ok: rebuilt data/ from sqlite ({len(changed)} of {len(written)} files changed)", files
+    return (
+        f"ok: incrementally rebuilt {len(plan['games'])} game(s) from sqlite "
+        f"({len(changed)} of {len(written)} files changed)"
+    ), files
+
+
+# ---- resident build ----
+
+class ResidentBuild:
+    """
+    keeps the sqlite rows loaded between builds, so a long-running caller
+    (admin_api) only re-reads the games that were saved instead of starting a
+    new interpreter and reloading everything.
+    """
+
+    def __init__(self, db_path: Path | None = None, engine: str = "pandas"):
+        self.db_path = db_path or DB_PATH
+        self.engine = engine
+        self.tables = None
+
+    def connect(self) -> sqlite3.Connection:
+        return open_db(self.db_path)
+
+    def refresh(self, games: set | None = None) -> None:
+        """re-reads the rows of games, or every table when games is None or nothing is loaded yet"""
+        if self.tables is not None and games is not None and not games:
+            return
+
+        con = self.connect()
+        try:
+            if self.tables is None or games is None:
+                self.tables = read_game_rows(con)
+                return
+            fresh = read_game_rows(con, games)
+        finally:
+            con.close()
+
+        keys = {(int(s), int(g)) for s, g in games}
+        for name, order in [("ir", "_rowid"), ("gps", "_rowid"), ("events", "id")]:
+            cols, rows = self.tables[name]
+            si = cols.index("SEASON" if name == "ir" else "season")
+            gi = cols.index("GAME" if name == "ir" else "game")
+            oi = cols.index(order)
+            kept = [r for r in rows if (r[si], r[gi]) not in keys]
+            self.tables[name] = (cols, sorted(kept + fresh[name][1], key=lambda r: r[oi]))
+
+    def build(self, games: set | None = None, incremental: bool = True) -> str:
+        """refreshes games (see refresh) and rebuilds data/; returns the summary line"""
+        self.refresh(games)
+
+        con = self.connect()
+        try:
+            # tiny tables, and the admin app edits them outside of saves
+            opp_meta, player_bio = read_meta(con)
+        finally:
+            con.close()
+
+        df, gps = prepare_frames(rows_frame(*self.tables["ir"]), rows_frame(*self.tables["gps"]))
+        events = prepare_events(rows_frame(*self.tables["events"]))
+        message, _ = run_build(
+            df, opp_meta, player_bio, events, gps, incremental=incremental, engine=self.engine, db_path=self.db_path
         )
-        if t_df.empty:
-            continue
-        write_json(DATA_DIR / "aggregates" / f"by_type_{t}.json", calc_averages(t_df).to_dict(orient="records"))
+        return message
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="rebuild data/ from ir_stats.db")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only rebuild outputs that depend on games changed since the last build",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes for the build (0 = one per cpu)",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="write minified json with precompressed .gz / .br siblings and report payload sizes",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="store lists of records as column arrays instead of repeating every key per row",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=sorted(AGGREGATION_ENGINES),
+        default="pandas",
+        help="where the aggregate tables are grouped: in pandas, or pushed down to sqlite",
+    )
+    args = parser.parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    set_output(args.compact, args.columnar)
+
+    con = open_db()
+    try:
+        source = source_fingerprint(con)
+    finally:
+        con.close()
+
+    # nothing changed since the last build: stop before pandas is even loaded
+    if args.incremental and source_unchanged(source):
+        print("ok: data/ already up to date")
+        return
 
-    build_player_profiles(df, player_bio)
-    build_assist_links(game_events, seasons)
+    # the sql engine groups the assists in sqlite, so it never loads every event
+    df, opp_meta, player_bio, game_events, gps = load_from_sqlite(events=args.engine == "pandas")
+    message, files = run_build(
+        df, opp_meta, player_bio, game_events, gps, args.incremental, jobs, args.engine, source=source
+    )
+    print(message)
 
-    print("ok: rebuilt data/ from sqlite")
+    if (args.compact or args.columnar) and files is not None:
+        print_payload_report(payload_report(files))
 
 if __name__ == "__main__":
     main()
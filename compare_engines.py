@@ -0,0 +1,119 @@
+"""
+checks that the aggregation engines of build_data_from_sqlite.py agree.
+
+builds data/ once per engine from a copy of the same database, each in its
+own temporary directory, and compares every output file byte for byte.
+exits non-zero and lists the files that differ if any do.
+
+--baseline REV also builds with build_data_from_sqlite.py as of git revision
+REV (e.g. the commit before the aggregation cube) and checks that every file
+it writes comes out the same from this tree. the archives are then REV's own
+ir_stats.db and synthetic ones in the original text schema, which any
+revision can read.
+
+    python compare_engines.py
+    python compare_engines.py --db other.db
+    python compare_engines.py --synthetic 20 100
+    python compare_engines.py --baseline e2518b8 --synthetic 20
+"""
+import argparse
+import io
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+
+from bench_build import generate_db
+
+REPO = Path(__file__).resolve().parent
+BUILD_SCRIPT = REPO / "build_data_from_sqlite.py"
+ENGINES = ["pandas", "sql"]
+# files about the build itself, whose format is not part of the comparison with a baseline
+BOOKKEEPING = {"build_state.json", "manifest.json", "source_state.json"}
+# the sql engine hashes game_events straight from sqlite, so its game hashes differ
+ENGINE_STATE = {"build_state.json"}
+
+
+def build(db: Path, workdir: Path, engine: str | None, extra: list[str], script: Path = BUILD_SCRIPT) -> dict[str, bytes]:
+    """builds data/ in workdir from a copy of db; returns every output file by relative path"""
+    workdir.mkdir()
+    shutil.copyfile(db, workdir / "ir_stats.db")
+    engine_args = ["--engine", engine] if engine else []
+    proc = subprocess.run(
+        [sys.executable, str(script), *engine_args, *extra],
+        cwd=workdir,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"{engine or script} build failed:\n{proc.stderr}")
+
+    data = workdir / "data"
+    return {p.relative_to(data).as_posix(): p.read_bytes() for p in sorted(data.rglob("*")) if p.is_file()}
+
+
+def checkout(rev: str, dest: Path) -> Path:
+    """extracts the tree at rev into dest"""
+    archive = subprocess.run(["git", "archive", rev], cwd=REPO, capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest, filter="data")
+    return dest
+
+
+def report(label: str, a_name: str, a: dict, b_name: str, b: dict, only_a: bool = False) -> bool:
+    # only_a: files b writes that a does not are new outputs, not a difference
+    missing = sorted(a.keys() - b.keys() if only_a else a.keys() ^ b.keys())
+    differ = sorted(k for k in a.keys() & b.keys() if a[k] != b[k])
+    print(f"{label}: {a_name} vs {b_name}: {len(a)} files, {len(differ)} differ, {len(missing)} only in one")
+    for k in differ[:20]:
+        print(f"  differs: {k}")
+    for k in missing[:20]:
+        print(f"  only in {a_name if k in a else b_name}: {k}")
+    return not (missing or differ)
+
+
+def compare(db: Path, label: str, extra: list[str], baseline: Path | None = None) -> bool:
+    with tempfile.TemporaryDirectory(prefix="ir_engines_") as tmp:
+        outputs = {engine: build(db, Path(tmp) / engine, engine, extra) for engine in ENGINES}
+        if baseline is not None:
+            old = build(db, Path(tmp) / "baseline", None, extra, baseline / "build_data_from_sqlite.py")
+            old = {k: v for k, v in old.items() if k not in BOOKKEEPING}
+
+    base, *others = ENGINES
+    ok = True
+    outputs = {e: {k: v for k, v in files.items() if k not in ENGINE_STATE} for e, files in outputs.items()}
+    for engine in others:
+        ok &= report(label, base, outputs[base], engine, outputs[engine])
+    if baseline is not None:
+        ok &= report(label, "baseline", old, base, outputs[base], only_a=True)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=Path, default=REPO / "ir_stats.db")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[], help="also compare on generated archives with this many seasons")
+    parser.add_argument("--baseline", metavar="REV", help="also compare against the build at this git revision")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--columnar", action="store_true")
+    args = parser.parse_args()
+    extra = [f for f in ("--compact", "--columnar") if getattr(args, f[2:])]
+
+    with tempfile.TemporaryDirectory(prefix="ir_baseline_") as src:
+        baseline = checkout(args.baseline, Path(src)) if args.baseline else None
+        db = baseline / "ir_stats.db" if baseline is not None else args.db
+        ok = compare(db, db.name, extra, baseline)
+        for n in args.synthetic:
+            with tempfile.TemporaryDirectory(prefix="ir_engines_db_") as tmp:
+                db = Path(tmp) / "ir_stats.db"
+                generate_db(db, n, migrated=baseline is None)
+                ok &= compare(db, f"{n} synthetic seasons", extra, baseline)
+
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+versioned schema migrations for ir_stats.db.
+
+the schema version is stored in PRAGMA user_version. each step runs once, in
+order, in its own transaction. before the first pending step the database is
+copied to ir_stats.db.v<version>.bak. admin_api migrates once at startup and
+build_data_from_sqlite.py when it opens the database; it can also be run by hand:
+
+    python migrate_db.py            # bring ir_stats.db up to date
+    python migrate_db.py --status   # print the version, change nothing
+"""
+import argparse
+import sqlite3
+from pathlib import Path
+
+DB_PATH = Path("ir_stats.db")
+
+COUNT_COLS = [
+    "2PM", "2PA", "3PM", "3PA", "FGM", "FGA", "FTM", "FTA",
+    "OREB", "DREB", "PTS", "REB", "AST", "BLK", "STL", "TOV", "FLS",
+]
+PCT_COLS = ["FG%", "TS%", "FT%", "2P%", "3P%"]
+
+# ROLE of an InjuryReserves row: a player line, the team's score row
+# (NAMES = 'Injury Reserves'), or the opponent's mirror row (OPP = 'Injury Reserves')
+ROLES = ("player", "team", "opponent")
+
+
+def base_tables(c: sqlite3.Connection) -> None:
+    """tables the admin app owns, plus the client_id column live event ingestion needs"""
+    c.execute("""
+        create table if not exists OpponentMeta (
+            opp text primary key,
+            color text
+        )
+    """)
+    c.execute("""
+        create table if not exists game_events (
+            id integer primary key autoincrement,
+            season integer not null,
+            game integer not null,
+            type text,
+            opp text,
+            period text,
+            clock text,
+            event_kind text not null,
+            player text,
+            other_player text,
+            code text,
+            points integer default 0,
+            client_id text
+        )
+    """)
+    cols = {row[1] for row in c.execute("pragma table_info(game_events)")}
+    if "client_id" not in cols:
+        c.execute("alter table game_events add column client_id text")
+    c.execute(
+        "create unique index if not exists game_events_client_id "
+        "on game_events (season, game, client_id)"
+    )
+
+
+def typed_injury_reserves(c: sqlite3.Connection) -> None:
+    """
+    rewrites InjuryReserves with INTEGER / REAL stat columns and a stored ROLE,
+    and indexes the columns the api and build filter on. percentages saved as
+    text like "15.38%" become fractions, the same as the admin page saves them.
+    """
+    counts = ", ".join(f'"{col}" INTEGER' for col in COUNT_COLS)
+    pcts = ", ".join(f'"{col}" REAL' for col in PCT_COLS)
+    c.execute(f"""
+        CREATE TABLE "InjuryReserves_typed" (
+            "OPP" TEXT, "SEASON" INTEGER, "GAME" INTEGER, "NAMES" TEXT,
+            {counts},
+            {pcts},
+            "GSC" REAL,
+            "TYPE" TEXT,
+            "ROLE" TEXT NOT NULL DEFAULT 'player' CHECK ("ROLE" IN {ROLES})
+        )
+    """)
+
+    exists = c.execute(
+        "select 1 from sqlite_master where type='table' and name='InjuryReserves'"
+    ).fetchone()
+    if exists:
+        # column affinity turns '12' into 12 and '-5.70' into -5.7 on insert
+        pct_values = ", ".join(
+            f"""CASE WHEN "{col}" LIKE '%\\%' ESCAPE '\\'
+                THEN round(CAST(rtrim("{col}", '%') AS REAL) / 100, 6) ELSE "{col}" END"""
+            for col in PCT_COLS
+        )
+        plain = ", ".join(f'"{col}"' for col in ["OPP", "SEASON", "GAME", "NAMES", *COUNT_COLS])
+        cols = ", ".join(f'"{col}"' for col in ["OPP", "SEASON", "GAME", "NAMES", *COUNT_COLS, *PCT_COLS, "GSC", "TYPE", "ROLE"])
+        # rowid is kept, the build uses it for table order
+        c.execute(f"""
+            INSERT INTO "InjuryReserves_typed" (rowid, {cols})
+            SELECT rowid, {plain}, {pct_values}, "GSC", "TYPE",
+                CASE
+                    WHEN lower("OPP") = 'injury reserves' THEN 'opponent'
+                    WHEN lower("NAMES") = 'injury reserves' THEN 'team'
+                    ELSE 'player'
+                END
+            FROM "InjuryReserves"
+            ORDER BY rowid
+        """)
+
+        # text that is still text is not a number ('', 'DNP'). the build used to
+        # read it with to_numeric(errors="coerce"), so it becomes NULL the same way
+        for col in [*COUNT_COLS, *PCT_COLS, "GSC"]:
+            c.execute(f'UPDATE "InjuryReserves_typed" SET "{col}" = NULL WHERE typeof("{col}") = \'text\'')
+
+        c.execute('DROP TABLE "InjuryReserves"')
+
+    c.execute('ALTER TABLE "InjuryReserves_typed" RENAME TO "InjuryReserves"')
+    c.execute('CREATE INDEX ir_season_game ON "InjuryReserves" ("SEASON", "GAME")')
+    c.execute('CREATE INDEX ir_names ON "InjuryReserves" ("NAMES", "ROLE")')
+    c.execute('CREATE INDEX ir_opp ON "InjuryReserves" ("OPP")')
+    c.execute('CREATE INDEX ir_role_game ON "InjuryReserves" ("ROLE", "SEASON", "GAME")')
+
+    exists = c.execute(
+        "select 1 from sqlite_master where type='table' and name='game_player_stats'"
+    ).fetchone()
+    if exists:
+        c.execute("create index if not exists gps_season_game on game_player_stats (season, game)")
+
+
+# stats kept per player in the summary tables: the sum and max of each, plus
+# gp (rows) and GSC_cnt (rows with a GSC) for averages
+SUMMARY_STATS = [*COUNT_COLS, "GSC"]
+
+SUMMARY_TABLES = {
+    "player_career_summary": ["name"],
+    "player_season_summary": ["name", "season"],
+}
+
+
+def summary_ddl(table: str, keys: list[str]) -> str:
+    key_cols = ", ".join(f"{k} {'INTEGER' if k == 'season' else 'TEXT'} NOT NULL" for k in keys)
+    stat_cols = ", ".join(
+        f'"{c}" {"REAL" if c == "GSC" else "INTEGER"} NOT NULL DEFAULT 0, "{c}_max" {"REAL" if c == "GSC" else "INTEGER"}'
+        for c in SUMMARY_STATS
+    )
+    return f"""
+        CREATE TABLE {table} (
+            {key_cols},
+            gp INTEGER NOT NULL DEFAULT 0,
+            "GSC_cnt" INTEGER NOT NULL DEFAULT 0,
+            {stat_cols},
+            PRIMARY KEY ({", ".join(keys)})
+        )
+    """
+
+
+def summary_add(table: str, keys: list[str], row: str) -> str:
+    """upsert adding one InjuryReserves row (row = new / old) into table"""
+    key_vals = {"name": f'{row}."NAMES"', "season": f'{row}."SEASON"'}
+    cols = [*keys, "gp", '"GSC_cnt"', *(f'"{c}"' for c in SUMMARY_STATS), *(f'"{c}_max"' for c in SUMMARY_STATS)]
+    vals = [
+        *(key_vals[k] for k in keys), "1", f'{row}."GSC" IS NOT NULL',
+        *(f'coalesce({row}."{c}", 0)' for c in SUMMARY_STATS),
+        *(f'{row}."{c}"' for c in SUMMARY_STATS),
+    ]
+    sets = ["gp = gp + 1", '"GSC_cnt" = "GSC_cnt" + excluded."GSC_cnt"']
+    sets += [f'"{c}" = "{c}" + excluded."{c}"' for c in SUMMARY_STATS]
+    # scalar max() is NULL if either side is NULL, so skip missing values
+    sets += [f'"{c}_max" = coalesce(max("{c}_max", excluded."{c}_max"), "{c}_max", excluded."{c}_max")' for c in SUMMARY_STATS]
+    return f"""
+        INSERT INTO {table} ({", ".join(cols)}) VALUES ({", ".join(vals)})
+        ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {", ".join(sets)};
+    """
+
+
+def summary_remove(table: str, keys: list[str]) -> str:
+    """subtracts the deleted row (old); maxes are recomputed from the player's remaining rows"""
+    key_match = {"name": 'name = old."NAMES"', "season": 'season = old."SEASON"'}
+    row_match = {"name": '"NAMES" = old."NAMES"', "season": '"SEASON" = old."SEASON"'}
+    where = " AND ".join(key_match[k] for k in keys)
+    rows = " AND ".join([""""ROLE" = 'player'""", *(row_match[k] for k in keys)])
+    sets = ["gp = gp - 1", '"GSC_cnt" = "GSC_cnt" - (old."GSC" IS NOT NULL)']
+    sets += [f'"{c}" = "{c}" - coalesce(old."{c}", 0)' for c in SUMMARY_STATS]
+    sets += [f'"{c}_max" = (SELECT max("{c}") FROM "InjuryReserves" WHERE {rows})' for c in SUMMARY_STATS]
+    return f"""
+        UPDATE {table} SET {", ".join(sets)} WHERE {where};
+        DELETE FROM {table} WHERE {where} AND gp <= 0;
+    """
+
+
+def summary_tables(c: sqlite3.Connection) -> None:
+    """
+    player_career_summary / player_season_summary: per-player sums, maxes and
+    counts over the player rows of InjuryReserves, kept current by triggers so
+    every writer (save_game, a re-save, hand edits) updates them.
+    """
+    for table, keys in SUMMARY_TABLES.items():
+        c.execute(summary_ddl(table, keys))
+        key_cols = {"name": '"NAMES"', "season": '"SEASON"'}
+        group = ", ".join(key_cols[k] for k in keys)
+        c.execute(f"""
+            INSERT INTO {table} ({", ".join(keys)}, gp, "GSC_cnt",
+                {", ".join(f'"{c}"' for c in SUMMARY_STATS)},
+                {", ".join(f'"{c}_max"' for c in SUMMARY_STATS)})
+            SELECT {group}, count(*), count("GSC"),
+                {", ".join(f'coalesce(sum("{c}"), 0)' for c in SUMMARY_STATS)},
+                {", ".join(f'max("{c}")' for c in SUMMARY_STATS)}
+            FROM "InjuryReserves"
+            WHERE "ROLE" = 'player' AND "NAMES" IS NOT NULL
+            GROUP BY {group}
+        """)
+
+    def is_player(row: str) -> str:
+        return f"""{row}."ROLE" = 'player' AND {row}."NAMES" IS NOT NULL"""
+
+    adds_new = "".join(summary_add(t, k, "new") for t, k in SUMMARY_TABLES.items())
+    removes_old = "".join(summary_remove(t, k) for t, k in SUMMARY_TABLES.items())
+    c.execute(f"""
+        CREATE TRIGGER ir_summary_insert AFTER INSERT ON "InjuryReserves"
+        WHEN {is_player("new")}
+        BEGIN {adds_new} END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER ir_summary_delete AFTER DELETE ON "InjuryReserves"
+        WHEN {is_player("old")}
+        BEGIN {removes_old} END
+    """)
+    # an update is the old row leaving and the new one arriving. either order
+    # ends in the same state, since removal rereads the maxes from the table
+    c.execute(f"""
+        CREATE TRIGGER ir_summary_update_old AFTER UPDATE ON "InjuryReserves"
+        WHEN {is_player("old")}
+        BEGIN {removes_old} END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER ir_summary_update_new AFTER UPDATE ON "InjuryReserves"
+        WHEN {is_player("new")}
+        BEGIN {adds_new} END
+    """)
+
+
+# position + 1 is the schema version a step brings the database to
+MIGRATIONS = [
+    base_tables,
+    typed_injury_reserves,
+    summary_tables,
+]
+
+
+def schema_version(c: sqlite3.Connection) -> int:
+    return c.execute("pragma user_version").fetchone()[0]
+
+
+def backup(c: sqlite3.Connection) -> Path | None:
+    """copies the database next to itself as <name>.v<version>.bak; None for an empty or in-memory one"""
+    path = next((row[2] for row in c.execute("pragma database_list") if row[1] == "main"), "")
+    if not path or not c.execute("select 1 from sqlite_master").fetchone():
+        return None
+    dest = Path(f"{path}.v{schema_version(c)}.bak")
+    target = sqlite3.connect(dest)
+    try:
+        c.backup(target)
+    finally:
+        target.close()
+    return dest
+
+
+def migrate(c: sqlite3.Connection) -> int:
+    """backs the database up and applies every pending migration; returns the schema version"""
+    if schema_version(c) >= len(MIGRATIONS):
+        return schema_version(c)
+
+    if c.in_transaction:
+        c.commit()
+    backup(c)
+    for target, step in enumerate(MIGRATIONS, start=1):
+        # immediate takes the write lock first, so two processes can't both migrate
+        c.execute("begin immediate")
+        try:
+            if schema_version(c) < target:
+                step(c)
+                c.execute(f"pragma user_version = {target}")
+            c.commit()
+        except BaseException:
+            c.rollback()
+            raise
+    return schema_version(c)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="migrate ir_stats.db to the current schema")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--status", action="store_true", help="print the schema version and exit")
+    args = parser.parse_args()
+
+    con = sqlite3.connect(args.db)
+    try:
+        before = schema_version(con)
+        if args.status:
+            print(f"{args.db}: schema version {before} of {len(MIGRATIONS)}")
+            return
+        after = migrate(con)
+    finally:
+        con.close()
+
+    if after == before:
+        print(f"{args.db}: already at schema version {after}")
+    else:
+        print(f"{args.db}: migrated from version {before} to {after}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,53 @@ const state = {
   player: null,
 };
 
+let manifestPromise = null;
+
+// data/manifest.json maps each generated file to a content hash, so unchanged
+// files can be fetched from a versioned URL and served from the browser cache
+function loadManifest(){
+  if (!manifestPromise) {
+    manifestPromise = fetch("data/manifest.json", { cache: "no-store" })
+      .then(res => res.ok ? res.json() : null)
+      .then(manifest => manifest?.files || {})
+      .catch(() => ({}));
+  }
+  return manifestPromise;
+}
+
+// builds run with --columnar store lists of records as
+// {"$columns": [...], "$values": [[column 0], [column 1], ...]}; turn them back
+// into plain row objects so the renderers see the same data either way
+function decodeColumnar(v){
+  if (Array.isArray(v)) return v.map(decodeColumnar);
+  if (!v || typeof v !== "object") return v;
+  if (Array.isArray(v.$columns)) {
+    const cols = v.$columns;
+    const values = v.$values;
+    const n = values.length ? values[0].length : 0;
+    const rows = new Array(n);
+    for (let i = 0; i < n; i++) {
+      const row = {};
+      for (let j = 0; j < cols.length; j++) {
+        const x = values[j][i];
+        row[cols[j]] = x !== null && typeof x === "object" ? decodeColumnar(x) : x;
+      }
+      rows[i] = row;
+    }
+    return rows;
+  }
+  for (const k of Object.keys(v)) v[k] = decodeColumnar(v[k]);
+  return v;
+}
+
 async function loadJSON(path){
-  const res = await fetch(path, { cache: "no-store" });
+  const files = await loadManifest();
+  const entry = files[path];
+  const res = entry
+    ? await fetch(`${path}?v=${entry.hash.slice(0, 16)}`)
+    : await fetch(path, { cache: "no-store" });
   if (!res.ok) throw new Error(`failed to load ${path}`);
-  return res.json();
+  return decodeColumnar(await res.json());
 }
 
 function slugify(s){
@@ -68,6 +68,13 @@
 
   const els = {};
 
+  // events already sent to /api/events; kept out of undo snapshots on purpose
+  // so an undo shows up as a retraction. ids in "settled" belong to a saved game.
+  // "target" is the committed season / game the feed follows, "moved" holds
+  // retractions still owed to a game the feed has left.
+  const eventSync = { key: null, meta: null, target: null, sent: new Set(), settled: new Set(), moved: [] };
+  let eventCounter = 0;
+
   const SCORING_ACTIONS = [
     { code: "2PM", title: "Made 2", subtitle: "asks for assist" },
     { code: "3PM", title: "Made 3", subtitle: "asks for assist" },
@@ -220,6 +227,7 @@
   }
 
   function syncMetaInputs() {
+    commitEventTarget();
     els.seasonInput.value = state.meta.season;
     els.gameInput.value = state.meta.game;
     els.oppInput.value = state.meta.opp;
@@ -365,6 +373,7 @@
 
   function logSubEvent(player, action, otherPlayer) {
     state.events.unshift({
+      id: newEventId(),
       kind: "sub",
       player,
       action,
@@ -410,6 +419,7 @@
     const action = actionByCode(code);
     if (!action) return;
     state.events.unshift({
+      id: newEventId(),
       kind: "player",
       player,
       code,
@@ -556,6 +566,7 @@
 
   function commitAssistEvent(assistedBy, scorer, shot) {
     state.events.unshift({
+      id: newEventId(),
       kind: "assist",
       player: assistedBy,
       toPlayer: scorer,
@@ -635,6 +646,7 @@
     pushUndo(`opp +${points}`);
     state.meta.oppScore = clampInt(state.meta.oppScore) + points;
     state.events.unshift({
+      id: newEventId(),
       kind: "opp",
       points,
       period: state.meta.period,
@@ -917,7 +929,60 @@
     return response.json();
   }
 
+  function newEventId() {
+    eventCounter += 1;
+    return `${Date.now().toString(36)}-${eventCounter.toString(36)}-${Math.random().toString(36).slice(2, 8)}`;
+  }
+
+  // stream new plays (and undone ones) to the server as they happen, so a
+  // crashed tab loses nothing and the final save only has to reconcile
+  // the feed only follows season / game once an edit is committed (change,
+  // or the inputs being set from code), never a half-typed number
+  function commitEventTarget() {
+    eventSync.target = { season: Number(state.meta.season), game: Number(state.meta.game) };
+  }
+
+  function syncEvents() {
+    const { season, game } = eventSync.target || {};
+    if (!season || !game) return;
+    const key = `${season}:${game}`;
+    if (eventSync.key !== key) {
+      // plays posted under the old game move to the new one: take them back
+      // out of the old game, or they stay in its play-by-play for good
+      if (eventSync.meta && eventSync.sent.size) {
+        eventSync.moved.push({ meta: eventSync.meta, events: [], retract: [...eventSync.sent] });
+      }
+      eventSync.key = key;
+      eventSync.sent = new Set();
+    }
+    eventSync.meta = { season, game, opp: state.meta.opp, type: state.meta.type };
+
+    eventSync.moved.splice(0).forEach((batch) => {
+      postJson("/api/events", batch).catch(() => eventSync.moved.push(batch));
+    });
+
+    const live = new Set(state.events.map((event) => event.id));
+    const events = [...state.events]
+      .reverse()
+      .filter((event) => event.id && !eventSync.sent.has(event.id) && !eventSync.settled.has(event.id));
+    const retract = [...eventSync.sent].filter((id) => !live.has(id));
+    if (!events.length && !retract.length) return;
+
+    events.forEach((event) => eventSync.sent.add(event.id));
+    retract.forEach((id) => eventSync.sent.delete(id));
+    postJson("/api/events", {
+      meta: eventSync.meta,
+      events,
+      retract,
+    }).catch(() => {
+      // try again on the next push
+      events.forEach((event) => eventSync.sent.delete(event.id));
+      retract.forEach((id) => eventSync.sent.add(id));
+    });
+  }
+
   function pushLiveState() {
+    syncEvents();
     const players = buildPayloadPlayers();
     const currentTeamScore = teamScore(aggregateStats());
     const currentOppScore = state.meta.oppScore;
@@ -1017,12 +1082,39 @@
     try {
       setStatus("saving...");
       const response = await postJson("/api/save_game", payload);
-      setStatus(`saved ${response.inserted} rows`);
+      // the saved game owns these rows now; a later reset must not retract them
+      state.events.forEach((event) => eventSync.settled.add(event.id));
+      eventSync.sent = new Set();
+      setStatus(`saved ${response.inserted} rows, publishing...`);
+      watchPublish(response.inserted, response.buildTicket);
     } catch (error) {
       setStatus(String(error.message || error), true);
     }
   }
 
+  // the site rebuild runs in the background after a save; poll until the
+  // build that includes this save has finished
+  async function watchPublish(inserted, ticket) {
+    if (!ticket) return;
+    while (true) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      let status;
+      try {
+        const response = await fetch(`${API}/api/build_status`, { cache: "no-store" });
+        if (!response.ok) continue;
+        status = await response.json();
+      } catch (_) {
+        continue;
+      }
+      if (status.requested > ticket) return; // a later save took over the status line
+      if (status.built >= ticket) {
+        if (status.lastOk) setStatus(`saved ${inserted} rows, published in ${status.lastDuration}s`);
+        else setStatus(`saved ${inserted} rows, publish failed: ${status.lastError}`, true);
+        return;
+      }
+    }
+  }
+
   function resetGame() {
     pushUndo("reset");
     stopClock();
@@ -1056,6 +1148,8 @@
   function bindInputs() {
     els.seasonInput.addEventListener("input", () => { state.meta.season = clampInt(els.seasonInput.value); });
     els.gameInput.addEventListener("input", () => { state.meta.game = clampInt(els.gameInput.value); });
+    els.seasonInput.addEventListener("change", commitEventTarget);
+    els.gameInput.addEventListener("change", commitEventTarget);
     els.oppInput.addEventListener("input", () => {
       state.meta.opp = els.oppInput.value.trim();
       const match = (state.bootstrap?.opponents || []).find((item) => item.opp.toLowerCase() === state.meta.opp.toLowerCase());